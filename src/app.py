@@ -1,7 +1,6 @@
 import logging
-import traceback
 
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify
 
 from lib.logger import setup_logging
 from settings import APP, PROCESS, LOG_PATH, ENVIRONMENT
@@ -16,20 +15,22 @@ setup_logging(
     process=PROCESS,
     log_path=LOG_PATH)
 
-for logger_name in ["werkzeug"]:
-    logging.getLogger(logger_name).setLevel(logging.CRITICAL)
+# Disabled loggers fail isEnabledFor() straight away, so no access-log record is ever built
+werkzeug_logger = logging.getLogger("werkzeug")
+werkzeug_logger.setLevel(logging.CRITICAL)
+werkzeug_logger.propagate = False
+werkzeug_logger.addHandler(logging.NullHandler())
+werkzeug_logger.disabled = True
 
 
 @app.errorhandler(Exception)
 def handle_exception(e):
-    logger.error(
-        "Unhandled exception: %s",
-        e,
-        extra={"traceback": traceback.format_exc()},
-    )
+    logger.error("Unhandled exception: %s", e, exc_info=e)
     return jsonify(error=str(e)), 500
 
 
 @app.get("/div/<int:a>/<int:b>")
 def divide(a: int, b: int):
-    return dict(result=a / b)
\ No newline at end of file
+    # repr of a finite float is valid JSON, so the body is built without a serializer.
+    # ZeroDivisionError is left to handle_exception, which logs it and returns a 500.
+    return Response(f'{{"result":{a / b}}}', mimetype="application/json")
@@ -1,13 +1,13 @@
 from commands import setup_commands
 from lib.cli import cli
-
-import logging
-
-logging.basicConfig(
-            format='%(asctime)s [%(levelname)s] %(message)s',
-            level=logging.INFO,
-            datefmt='%d/%m/%Y %X'
-        )
+from lib.logger import setup_logging
+from settings import APP, PROCESS, LOG_PATH
+
+setup_logging(
+    env='local',
+    app=APP,
+    process=PROCESS,
+    log_path=LOG_PATH)
 
 setup_commands(cli)
 
@@ -1,6 +1,5 @@
 import click
 from datetime import datetime, timezone
-from modules.logs.main import ask_to_log, DEFAULT_CW_SQL
 
 
 @click.command()
@@ -11,6 +10,9 @@ from modules.logs.main import ask_to_log, DEFAULT_CW_SQL
 @click.option("--query", type=str, default=None, help='CloudWatch Insights query (default: "fields @timestamp, @message | sort @timestamp asc")')
 
 def run(group: str, question: str, start: datetime, end: datetime | None, query: str | None):
+    # Imported here so the CLI starts without loading boto3/strands until the command runs
+    from modules.logs.main import ask_to_log, DEFAULT_CW_SQL
+
     start_dt = start.replace(tzinfo=timezone.utc)
     end_dt = end.replace(tzinfo=timezone.utc) if end else datetime.now(timezone.utc)
 
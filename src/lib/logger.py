@@ -1,29 +1,64 @@
+import atexit
+import io
 import logging
+import queue
 import sys
-from datetime import datetime
-from logging.handlers import TimedRotatingFileHandler
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
 from pathlib import Path
-from typing import Literal, Union
+from typing import Literal, Optional, Union
 
-from pythonjsonlogger.json import JsonFormatter
+from pythonjsonlogger.orjson import OrjsonFormatter
+
+# Background listener that drains the log queue in production (kept referenced to avoid GC)
+_listener: Optional[QueueListener] = None
+
+# Set once setup_logging has run; repeated imports (gunicorn --preload, tests) must not re-open handlers
+_CONFIGURED = False
 
 
 def uncaught_exception_handler(exc_type, exc_value, exc_traceback):
     """Handle uncaught exceptions by logging them."""
-    logging.exception("Uncaught exception: %s", exc_value)
+    logging.error("Uncaught exception: %s", exc_value, exc_info=(exc_type, exc_value, exc_traceback))
+
+
+class CachedTimeFormatter(logging.Formatter):
+    """Formatter that runs strftime at most once per second for dated formats."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._time_cache = threading.local()
+
+    def formatTime(self, record, datefmt=None):
+        """Reuse the formatted time while records fall within the same second."""
+        if datefmt is None:
+            # The default format includes milliseconds, so it cannot be cached per second
+            return super().formatTime(record, datefmt)
+
+        second = int(record.created)
+        cache = self._time_cache
+        if getattr(cache, 'second', None) != second:
+            cache.second = second
+            cache.value = super().formatTime(record, datefmt)
+        return cache.value
 
 
-class CloudWatchJsonFormatter(JsonFormatter):
-    """JSON formatter for CloudWatch logs with custom metadata fields."""
+class CloudWatchJsonFormatter(CachedTimeFormatter, OrjsonFormatter):
+    """JSON formatter (orjson-encoded) for CloudWatch logs with custom metadata fields."""
+
+    # @timestamp is emitted in UTC with a 'Z' suffix
+    converter = time.gmtime
 
     def __init__(self, app: str, process: str, *args, **kwargs):
         self.app = app
         self.process = process
         super().__init__(*args, **kwargs)
+        self.datefmt = '%Y-%m-%dT%H:%M:%S'
 
     def add_fields(self, log_record, record, message_dict):
         """Add CloudWatch-specific fields to log record."""
-        log_record['@timestamp'] = datetime.fromtimestamp(record.created).isoformat()
+        log_record['@timestamp'] = f'{self.formatTime(record, self.datefmt)}.{int(record.msecs):03d}Z'
         log_record['level'] = record.levelname
         log_record['app'] = self.app
         log_record['logger'] = record.name
@@ -31,34 +66,97 @@ class CloudWatchJsonFormatter(JsonFormatter):
         super(CloudWatchJsonFormatter, self).add_fields(log_record, record, message_dict)
 
 
-class ConsoleFormatter(logging.Formatter):
+# Standard log record attributes to exclude from console extras
+RESERVED_ATTRS = frozenset({
+    'name', 'msg', 'args', 'created', 'filename', 'funcName', 'levelname',
+    'levelno', 'lineno', 'module', 'msecs', 'message', 'pathname', 'process',
+    'processName', 'relativeCreated', 'thread', 'threadName', 'exc_info',
+    'exc_text', 'stack_info', 'asctime', 'taskName'
+})
+
+
+class ConsoleFormatter(CachedTimeFormatter):
     """Console formatter that includes extra fields."""
 
-    # Standard log record attributes to exclude from extras
-    RESERVED_ATTRS = {
-        'name', 'msg', 'args', 'created', 'filename', 'funcName', 'levelname',
-        'levelno', 'lineno', 'module', 'msecs', 'message', 'pathname', 'process',
-        'processName', 'relativeCreated', 'thread', 'threadName', 'exc_info',
-        'exc_text', 'stack_info', 'asctime'
-    }
+    # Bound once: format() runs for every record in the listener thread
+    _super_format = logging.Formatter.format
 
     def format(self, record):
+        reserved = RESERVED_ATTRS
+        d = record.__dict__
+
         # Format basic message
-        base_message = super().format(record)
+        base_message = self._super_format(record)
 
-        # Extract extra fields (anything not in standard attributes)
-        extras = {
-            key: value
-            for key, value in record.__dict__.items()
-            if key not in self.RESERVED_ATTRS
-        }
+        # Extract extra field names (anything not in standard attributes)
+        extra_keys = d.keys() - reserved
+        if not extra_keys:
+            return base_message
 
-        # Append extras to message if any exist
-        if extras:
-            extras_str = ' '.join(f'{k}={v}' for k, v in extras.items())
-            return f'{base_message} | {extras_str}'
+        # Append extras to message (a single extra is the common case)
+        if len(extra_keys) == 1:
+            key = next(iter(extra_keys))
+            return f'{base_message} | {key}={d[key]}'
 
-        return base_message
+        # The set is unordered; render in record order so console output is stable
+        extras_str = ' '.join([f'{k}={d[k]}' for k in d if k in extra_keys])
+        return f'{base_message} | {extras_str}'
+
+
+class BufferedRotatingFileHandler(TimedRotatingFileHandler):
+    """Timed rotating file handler that batches writes through a block buffer.
+
+    Records are flushed immediately only from ERROR upwards; everything else is
+    flushed when the buffer fills, every `flush_interval` seconds, or at exit.
+    """
+
+    BUFFER_SIZE = 64 * 1024
+
+    def __init__(self, *args, flush_interval: float = 30.0, **kwargs):
+        self.flush_interval = flush_interval
+        self._stop_flushing = threading.Event()
+        super().__init__(*args, **kwargs)
+        self._flush_thread = threading.Thread(target=self._flush_periodically, name='log-flush', daemon=True)
+        self._flush_thread.start()
+        atexit.register(self.flush)
+
+    def _open(self):
+        """Open the log file behind a block-buffered writer instead of a line-buffered stream."""
+        raw = open(self.baseFilename, self.mode.replace('t', '').replace('b', '') + 'b', buffering=0)
+        buffered = io.BufferedWriter(raw, buffer_size=self.BUFFER_SIZE)
+        return io.TextIOWrapper(buffered, encoding=self.encoding, errors=self.errors, write_through=False)
+
+    def shouldRollover(self, record):
+        """Compare the record time with the cached rollover time; defer to the base checks only once it is due."""
+        if record.created < self.rolloverAt:
+            return False
+        return super().shouldRollover(record)
+
+    def emit(self, record):
+        """Write the record, flushing only for ERROR and above."""
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+            if record.levelno >= logging.ERROR:
+                self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def _flush_periodically(self):
+        """Flush every flush_interval seconds until close() sets the event."""
+        while not self._stop_flushing.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        self._stop_flushing.set()
+        if self._flush_thread is not threading.current_thread():
+            self._flush_thread.join()
+        super().close()
 
 
 def setup_logging(
@@ -70,6 +168,9 @@ def setup_logging(
 ) -> None:
     """Configure logging with environment-specific settings.
 
+    Only the first call takes effect; later calls return immediately. Any handlers
+    installed on the root logger before that first call are closed and replaced.
+
     Args:
         env: Environment mode ('local' for human-readable, 'production' for JSON)
         app: Application name for log metadata
@@ -77,11 +178,22 @@ def setup_logging(
         process: Process identifier for log metadata
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
     """
+    global _listener, _CONFIGURED
+
+    if _CONFIGURED:
+        return
+
     if env == 'local':
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(CachedTimeFormatter(
+            fmt='%(asctime)s [%(levelname)s] %(message)s',
+            datefmt='%d/%m/%Y %X'
+        ))
+
         logging.basicConfig(
-            format='%(asctime)s [%(levelname)s] %(message)s',
             level=log_level,
-            datefmt='%d/%m/%Y %X'
+            handlers=[console_handler],
+            force=True
         )
     else:
         # Console handler with human-readable format for docker compose logs
@@ -99,8 +211,8 @@ def setup_logging(
             fmt='%(levelname)s %(name)s %(message)s'
         )
 
-        # File handler with hourly rotation (CloudWatch auto_removal deletes rotated files)
-        file_handler = TimedRotatingFileHandler(
+        # File handler with hourly rotation and buffered writes (CloudWatch auto_removal deletes rotated files)
+        file_handler = BufferedRotatingFileHandler(
             log_path,
             when='H',
             interval=1,
@@ -110,10 +222,27 @@ def setup_logging(
         file_handler.setLevel(logging.INFO)
         file_handler.setFormatter(json_formatter)
 
+        # Formatting and file I/O run in the listener thread; callers only enqueue records
+        log_queue = queue.Queue(-1)
+        _listener = QueueListener(
+            log_queue,
+            console_handler,
+            file_handler,
+            respect_handler_level=True
+        )
+        _listener.start()
+        atexit.register(_listener.stop)
+
+        # QueueHandler merges args and exc_info into the message; layout is left to the listener's handlers
+        queue_handler = QueueHandler(log_queue)
+        queue_handler.setFormatter(logging.Formatter('%(message)s'))
+
         logging.basicConfig(
             level=log_level,
-            handlers=[console_handler, file_handler]
+            handlers=[queue_handler],
+            force=True
         )
 
     # Install global exception handler
-    sys.excepthook = uncaught_exception_handler
\ No newline at end of file
+    sys.excepthook = uncaught_exception_handler
+    _CONFIGURED = True
\ No newline at end of file
@@ -1,9 +1,22 @@
+from functools import lru_cache
+
 from botocore.config import Config
 from strands.models import BedrockModel
 
 from settings import Models
 
 
+@lru_cache(maxsize=None)
+def _client_config(read_timeout: int, connect_timeout: int, max_attempts: int) -> Config:
+    """Shared botocore Config per timeout/retry combination"""
+    return Config(
+        read_timeout=read_timeout,
+        connect_timeout=connect_timeout,
+        retries={"max_attempts": max_attempts},
+    )
+
+
+@lru_cache(maxsize=None)
 def create_bedrock_model(
     model: str = Models.CLAUDE_45,
     temperature: float = 0.3,
@@ -14,6 +27,9 @@ def create_bedrock_model(
     """
     Create configured AWS Bedrock model instance
 
+    Instances are cached per argument combination, so agents created with the
+    same settings share one Bedrock client and its connection pool.
+
     Args:
         model: Bedrock model ID from Models enum
         temperature: Model temperature (0.0-1.0)
@@ -27,9 +43,5 @@ def create_bedrock_model(
     return BedrockModel(
         model_id=model,
         temperature=temperature,
-        boto_client_config=Config(
-            read_timeout=read_timeout,
-            connect_timeout=connect_timeout,
-            retries={"max_attempts": max_attempts},
-        ),
+        boto_client_config=_client_config(read_timeout, connect_timeout, max_attempts),
     )
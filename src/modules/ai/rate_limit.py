@@ -0,0 +1,54 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket for keeping model calls under a tokens-per-minute quota.
+
+    Callers block in acquire() until the bucket has refilled enough, so bursts are
+    spread over time instead of being rejected and retried by the provider.
+    """
+
+    def __init__(self, capacity: int, refill_per_second: float) -> None:
+        """
+        Args:
+            capacity: Maximum tokens the bucket holds (burst size)
+            refill_per_second: Tokens added back per second
+        """
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int) -> float:
+        """
+        Block until the requested tokens are available and take them.
+
+        Requests larger than the capacity are clamped to it, so they wait for a
+        full bucket instead of forever.
+
+        Args:
+            tokens: Number of tokens the call is expected to consume
+
+        Returns:
+            Seconds spent waiting
+        """
+        tokens = min(tokens, self.capacity)
+        waited = 0.0
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_per_second)
+                self._updated = now
+
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+
+                delay = (tokens - self._tokens) / self.refill_per_second
+
+            time.sleep(delay)
+            waited += delay
@@ -1,13 +1,21 @@
-import json
 import logging
+import random
+import re
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from datetime import datetime, timezone
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from itertools import islice, repeat
 
 import boto3
+import orjson
+from botocore.config import Config
 from botocore.exceptions import ClientError
+from diskcache import Cache
 
 from modules.ai.agent_factory import create_agent
+from modules.ai.rate_limit import TokenBucket
 from modules.logs.models import ChunkAnalysisResult, LogChunk
 from modules.logs.promps import (
     COORDINATOR_AGENT_PROMPT,
@@ -15,25 +23,78 @@ from modules.logs.promps import (
     WORKER_AGENT_PROMPT,
 )
 from modules.logs.tools import register_error_for_fix
-from settings import MAX_CHUNKS_TO_PROCESS, Models
+from settings import (
+    INSIGHTS_CACHE_DIR,
+    INSIGHTS_CACHE_TTL_SECONDS,
+    MAX_CHUNKS_TO_PROCESS,
+    MODEL_TOKENS_PER_MINUTE,
+    S3_LOG_ARCHIVES,
+    Models,
+)
 
 logger = logging.getLogger(__name__)
 
-logs_client = boto3.client("logs")
-
 MAX_RESULTS_PER_QUERY = 10000
+MAX_PARALLEL_QUERIES = 8
 
 CHUNK_SIZE = 2000
-MAX_PARALLEL_WORKERS = 5
+MAX_PARALLEL_WORKERS = 20  # concurrency ceiling; model_token_bucket paces the actual calls
 WORKER_TIMEOUT_SECONDS = 300
 DEFAULT_CW_SQL = "fields @timestamp, @message | sort @timestamp asc"
 
+TERMINAL_QUERY_STATUSES = frozenset({"Complete", "Failed", "Cancelled", "Timeout", "Unknown"})
+QUERY_POLL_INITIAL_DELAY = 0.2
+QUERY_POLL_MAX_DELAY = 2.0
+QUERY_POLL_BACKOFF = 1.7
+S3_ARCHIVE_COLUMNS = ["@timestamp", "@message"]
+DEDUP_MESSAGE_PREFIX_CHARS = 500
+AGGREGATION_QUERY_RE = re.compile(r"(?:^|\|)\s*stats\s", re.IGNORECASE)
+# ask_to_log rejects anything larger, so the S3 archive reader stops once it has read more
+MAX_LOG_RECORDS = MAX_CHUNKS_TO_PROCESS * CHUNK_SIZE
+# Events can reach Insights minutes after their timestamp; windows ending later than this are still filling
+INSIGHTS_INGESTION_MARGIN = timedelta(minutes=5)
+
+# One shared Logs client: the pool covers parallel queries and workers,
+# and adaptive retries back off client-side when Insights throttles
+AWS_CLIENT_CONFIG = Config(
+    max_pool_connections=max(MAX_PARALLEL_WORKERS * 4, 32),
+    retries={"mode": "adaptive", "max_attempts": 10},
+    tcp_keepalive=True,
+)
+# Shared by all worker agents so concurrent chunks stay under the model TPM quota
+model_token_bucket = TokenBucket(capacity=MODEL_TOKENS_PER_MINUTE, refill_per_second=MODEL_TOKENS_PER_MINUTE / 60)
+APPROX_BYTES_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=1)
+def _logs_client():
+    """Logs client shared by all Insights queries, created on first use"""
+    return boto3.Session().client("logs", config=AWS_CLIENT_CONFIG)
+
+
+@lru_cache(maxsize=None)
+def _archive_filesystem(bucket: str):
+    """pyarrow S3 filesystem in the bucket's own region, created on first use"""
+    from pyarrow import fs
+
+    return fs.S3FileSystem(
+        region=fs.resolve_s3_region(bucket),
+        retry_strategy=fs.AwsStandardS3RetryStrategy(max_attempts=10),
+    )
+
+
 def to_unix_seconds(dt: datetime) -> int:
     if dt.tzinfo is None:
         dt = dt.replace(tzinfo=timezone.utc)
     return int(dt.timestamp())
 
 
+def to_utc(dt: datetime) -> datetime:
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
 def explain_query_status(status: str) -> str:
     """
     Provide human-readable explanation for CloudWatch Insights query status.
@@ -59,38 +120,23 @@ def explain_query_status(status: str) -> str:
     return f"{explanation}. Check CloudWatch Logs console for more details."
 
 
-def insights_query(log_group: str, start: datetime, end: datetime, query: str, limit: int = 10000):
-    resp = logs_client.start_query(
-        logGroupName=log_group,
-        startTime=to_unix_seconds(start),
-        endTime=to_unix_seconds(end),
-        queryString=query,
-        limit=limit,
-    )
-    qid = resp["queryId"]
+# Powers of two, so multiplying by the reciprocal is exact
+_BYTES_TO_KB = 1 / 1024
+_BYTES_TO_MB = 1 / (1024 * 1024)
 
-    while True:
-        r = logs_client.get_query_results(queryId=qid)
-        if r["status"] in ["Complete", "Failed", "Cancelled", "Timeout", "Unknown"]:
-            return r["status"], r.get("results", [])
-        time.sleep(1)
 
-
-def calculate_payload_size(data: dict) -> tuple[int, float, float]:
+def calculate_payload_size(blob: bytes) -> tuple[int, float, float]:
     """
-    Calculate size of JSON payload in bytes, KB, and MB.
+    Calculate size of an already serialized JSON payload in bytes, KB, and MB.
 
     Args:
-        data: Dictionary to be serialized to JSON
+        blob: UTF-8 encoded JSON payload (e.g. from orjson.dumps)
 
     Returns:
         Tuple of (bytes, kilobytes, megabytes)
     """
-    json_str = json.dumps(data)
-    size_bytes = len(json_str.encode("utf-8"))
-    size_kb = size_bytes / 1024
-    size_mb = size_kb / 1024
-    return size_bytes, size_kb, size_mb
+    size_bytes = len(blob)
+    return size_bytes, size_bytes * _BYTES_TO_KB, size_bytes * _BYTES_TO_MB
 
 
 def create_empty_result_metadata() -> tuple[str, dict]:
@@ -113,64 +159,342 @@ def create_empty_result_metadata() -> tuple[str, dict]:
 
 def parse_log_entry(row: list[dict]) -> dict[str, str]:
     """Parse a single log entry, excluding internal fields."""
-    return {field["field"]: field["value"] for field in row if field["field"] != "@ptr"}
+    entry = {field["field"]: field["value"] for field in row}
+    entry.pop("@ptr", None)
+    return entry
 
 
-def query_chunk_recursively(log_group: str, start: datetime, end: datetime, query: str, depth: int = 0) -> list[list[dict]]:
+def collapse_duplicate_logs(logs: list[dict], prefix_chars: int = DEDUP_MESSAGE_PREFIX_CHARS) -> list[dict]:
     """
-    Queries a time chunk and subdivides it recursively if it hits the result limit.
-    Returns all log entries for the given time range.
+    Collapse log entries whose messages match (on their first prefix_chars characters).
+
+    Entries without an @message (custom `fields` projections) have nothing to compare
+    on, so each one is kept as its own entry.
+
+    Args:
+        logs: Parsed log dictionaries in chronological order
+        prefix_chars: Number of leading @message characters compared
+
+    Returns:
+        List of {"sample": first_matching_log, "count": occurrences} in first-seen order
+    """
+    collapsed: list[dict] = []
+    by_message: dict[str, dict] = {}
+    for log in logs:
+        message = log.get("@message")
+        if message is None:
+            collapsed.append({"sample": log, "count": 1})
+            continue
+
+        key = message[:prefix_chars]
+        entry = by_message.get(key)
+        if entry is None:
+            entry = by_message[key] = {"sample": log, "count": 1}
+            collapsed.append(entry)
+        else:
+            entry["count"] += 1
+    return collapsed
+
+
+def is_aggregation_query(query: str) -> bool:
+    """Whether an Insights query aggregates rows with a stats command."""
+    return AGGREGATION_QUERY_RE.search(query) is not None
+
+
+def _log_client_error(e: ClientError, indent: str, query: str) -> None:
+    """Log an Insights API error, pointing at the query when it is malformed."""
+    error_code = e.response.get('Error', {}).get('Code', 'Unknown')
+    error_message = e.response.get('Error', {}).get('Message', str(e))
+
+    if error_code == 'MalformedQueryException':
+        logger.error(
+            "%sQuery syntax error: CloudWatch Insights query is malformed. "
+            "Check query syntax: '%s'", indent, query
+        )
+        return
+
+    logger.error(
+        "%sAWS API error [%s]: %s", indent, error_code, error_message
+    )
+
+
+def _start_range_query(log_group: str, start_unix: int, end_unix: int, query: str, depth: int) -> str | None:
+    """
+    Starts an Insights query for an inclusive range of unix seconds and returns its query id.
+    Errors are logged and yield None so sibling ranges can still complete.
     """
     indent = "  " * depth
-    logger.info(f"{indent}Querying: {start} to {end}")
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "%sQuerying: %s to %s", indent,
+            datetime.fromtimestamp(start_unix, timezone.utc), datetime.fromtimestamp(end_unix, timezone.utc)
+        )
 
     try:
-        status, rows = insights_query(
-            log_group,
-            start=start,
-            end=end,
-            query=query,
-            limit=MAX_RESULTS_PER_QUERY
+        resp = _logs_client().start_query(
+            logGroupName=log_group,
+            startTime=start_unix,
+            endTime=end_unix,
+            queryString=query,
+            limit=MAX_RESULTS_PER_QUERY,
         )
     except ClientError as e:
-        error_code = e.response.get('Error', {}).get('Code', 'Unknown')
-        error_message = e.response.get('Error', {}).get('Message', str(e))
+        _log_client_error(e, indent, query)
+        return None
 
-        if error_code == 'MalformedQueryException':
-            logger.error(
-                f"{indent}Query syntax error: CloudWatch Insights query is malformed. "
-                f"Check query syntax: '{query}'"
-            )
-            return []
+    return resp["queryId"]
 
-        logger.error(
-            f"{indent}AWS API error [{error_code}]: {error_message}"
-        )
-        return []
 
-    if status != "Complete":
-        explanation = explain_query_status(status)
-        logger.error(f"{indent}Query failed with status '{status}': {explanation}")
-        return []
+def _query_subdivided(
+    log_group: str, start: datetime, end: datetime, query: str, max_in_flight: int
+) -> tuple[list[dict[str, str]], bool]:
+    """
+    Runs the subdividing Insights queries for a time range.
+    Insights executes queries server-side, so every in-flight query id is polled from
+    this one thread instead of parking a thread per query in a sleep loop.
+    Returns the parsed log entries in chronological order and whether every sub-range succeeded.
+    """
+    # Ranges are inclusive unix seconds (as Insights takes them), so halving is integer math
+    completed: list[tuple[int, list[dict[str, str]]]] = []
+    complete = True
+    to_start = deque([(to_unix_seconds(start), to_unix_seconds(end), 0)])
+    is_aggregation = is_aggregation_query(query)
+    running: dict[str, tuple[int, int, int]] = {}
+    delay = QUERY_POLL_INITIAL_DELAY
+
+    while to_start or running:
+        while to_start and len(running) < max_in_flight:
+            range_start, range_end, depth = to_start.popleft()
+            query_id = _start_range_query(log_group, range_start, range_end, query, depth)
+            if query_id is None:
+                complete = False
+            else:
+                running[query_id] = (range_start, range_end, depth)
+
+        finished_any = False
+        for query_id in list(running):
+            range_start, range_end, depth = running[query_id]
+            indent = "  " * depth
+
+            try:
+                r = _logs_client().get_query_results(queryId=query_id)
+            except ClientError as e:
+                _log_client_error(e, indent, query)
+                finished_any = True
+                complete = False
+                del running[query_id]
+                continue
+
+            status, rows = r["status"], r.get("results", [])
+            if status not in TERMINAL_QUERY_STATUSES:
+                continue
+
+            finished_any = True
+            del running[query_id]
+
+            if status != "Complete":
+                explanation = explain_query_status(status)
+                logger.error("%sQuery failed with status '%s': %s", indent, status, explanation)
+                complete = False
+                continue
+
+            logger.info("%sRetrieved %d records", indent, len(rows))
+
+            # Parse as each range lands so raw Insights rows don't outlive their query
+            if len(rows) < MAX_RESULTS_PER_QUERY:
+                completed.append((range_start, [parse_log_entry(row) for row in rows]))
+                continue
+
+            # Halving a stats query would return per-half aggregates, not the aggregate of the range
+            if is_aggregation:
+                logger.error(
+                    "%sAggregation query hit the limit of %d rows; results are truncated. "
+                    "Narrow the time range or use coarser bin() buckets.", indent, MAX_RESULTS_PER_QUERY
+                )
+                completed.append((range_start, [parse_log_entry(row) for row in rows]))
+                complete = False
+                continue
+
+            if range_end <= range_start:
+                logger.error(
+                    "%sA single second holds more than %d records; results are truncated.",
+                    indent, MAX_RESULTS_PER_QUERY
+                )
+                completed.append((range_start, [parse_log_entry(row) for row in rows]))
+                complete = False
+                continue
+
+            logger.warning("%sHit limit of %d. Subdividing chunk...", indent, MAX_RESULTS_PER_QUERY)
+
+            # Subdivide in half; both bounds are inclusive, so the halves don't overlap
+            midpoint = (range_start + range_end) // 2
+
+            logger.info("%sSubdividing into 2 chunks:", indent)
+            to_start.append((range_start, midpoint, depth + 1))
+            to_start.append((midpoint + 1, range_end, depth + 1))
+
+        # Every pass waits at least the initial delay so in-flight queries are never polled
+        # back to back; a finished query resets the backoff so new subdivisions are seen quickly
+        if finished_any:
+            delay = QUERY_POLL_INITIAL_DELAY
+        if running or to_start:
+            time.sleep(delay + random.uniform(0, delay * 0.1))
+            delay = min(delay * QUERY_POLL_BACKOFF, QUERY_POLL_MAX_DELAY)
+
+    completed.sort(key=lambda item: item[0])
+    return [entry for _, entries in completed for entry in entries], complete
+
+
+def query_chunk_recursively(
+    log_group: str, start: datetime, end: datetime, query: str, max_in_flight: int = MAX_PARALLEL_QUERIES
+) -> list[dict[str, str]]:
+    """
+    Queries a time chunk and subdivides it recursively if it hits the result limit.
+    Sibling halves are queried concurrently (up to max_in_flight Insights queries at once).
+    Returns all parsed log entries for the given time range in chronological order.
+    """
+    rows, _ = _query_subdivided(log_group, start, end, query, max_in_flight)
+    return rows
+
 
-    records_count = len(rows)
-    logger.info(f"{indent}Retrieved {records_count} records")
+@lru_cache(maxsize=1)
+def _insights_cache() -> Cache:
+    """Disk cache shared by all Insights lookups, opened on first use"""
+    return Cache(str(INSIGHTS_CACHE_DIR))
 
-    if records_count >= MAX_RESULTS_PER_QUERY:
-        logger.warning(f"{indent}Hit limit of {MAX_RESULTS_PER_QUERY}. Subdividing chunk...")
 
-        # Subdivide in half
-        midpoint = start + (end - start) / 2
+def query_insights_cached(log_group: str, start: datetime, end: datetime, query: str) -> list[dict[str, str]]:
+    """
+    query_chunk_recursively backed by a TTL disk cache keyed by (log_group, start, end, query).
+    Empty or partial results (a sub-range failed) and windows still inside the ingestion margin are never cached.
+    """
+    if INSIGHTS_CACHE_TTL_SECONDS <= 0:
+        return query_chunk_recursively(log_group, start, end, query=query)
 
-        logger.info(f"{indent}Subdividing into 2 chunks:")
-        first_half = query_chunk_recursively(log_group, start, midpoint, query, depth + 1)
-        second_half = query_chunk_recursively(log_group, midpoint, end, query, depth + 1)
+    cache = _insights_cache()
+    key = ("insights-logs", log_group, to_utc(start).isoformat(), to_utc(end).isoformat(), query)
 
-        return first_half + second_half
+    rows = cache.get(key)
+    if rows is not None:
+        logger.info("Insights cache hit: %d records", len(rows))
+        return rows
 
+    rows, complete = _query_subdivided(log_group, start, end, query, MAX_PARALLEL_QUERIES)
+    settled = to_utc(end) <= datetime.now(timezone.utc) - INSIGHTS_INGESTION_MARGIN
+    if rows and complete and settled:
+        cache.set(key, rows, expire=INSIGHTS_CACHE_TTL_SECONDS)
     return rows
 
 
+def archive_partition_prefixes(prefix: str, start: datetime, end: datetime) -> list[str]:
+    """
+    Build the hourly Firehose partition prefixes (UTC) overlapping a time range.
+
+    Args:
+        prefix: Archive key prefix, empty or ending with "/"
+        start: Start datetime of the range
+        end: End datetime of the range
+
+    Returns:
+        List of "year=YYYY/month=MM/day=DD/hour=HH/" prefixes in chronological order
+    """
+    hour = to_utc(start).replace(minute=0, second=0, microsecond=0)
+    end = to_utc(end)
+    prefixes = []
+    while hour <= end:
+        prefixes.append(f"{prefix}year={hour:%Y}/month={hour:%m}/day={hour:%d}/hour={hour:%H}/")
+        hour += timedelta(hours=1)
+    return prefixes
+
+
+def _archive_row_groups(filesystem, bucket: str, partitions: list[str]):
+    """Yield the archive columns of every row group under the partitions, footer-first with ranged reads."""
+    import pyarrow.parquet as pq
+    from pyarrow import fs
+
+    for partition in partitions:
+        selector = fs.FileSelector(f"{bucket}/{partition}", allow_not_found=True, recursive=True)
+        files = sorted(info.path for info in filesystem.get_file_info(selector) if info.type == fs.FileType.File)
+        for path in files:
+            with filesystem.open_input_file(path) as source:
+                # pre_buffer coalesces the selected column chunks into a few ranged GETs
+                parquet = pq.ParquetFile(source, pre_buffer=True)
+                for i in range(parquet.num_row_groups):
+                    yield parquet.read_row_group(i, columns=S3_ARCHIVE_COLUMNS)
+
+
+def fetch_records_via_s3(log_group: str, start: datetime, end: datetime) -> list[dict[str, str]]:
+    """
+    Reads log records from the group's Parquet archive in S3 instead of Insights.
+    Only the hourly partitions overlapping the range and the @timestamp/@message
+    column chunks are fetched, and reading stops past MAX_LOG_RECORDS. Entries
+    have the same shape and timestamp format as parsed Insights results.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    bucket, _, prefix = S3_LOG_ARCHIVES[log_group].removeprefix("s3://").partition("/")
+    if prefix and not prefix.endswith("/"):
+        prefix += "/"
+
+    ts_type = pa.timestamp("ms", tz="UTC")
+    lower = pa.scalar(to_utc(start), type=ts_type)
+    upper = pa.scalar(to_utc(end), type=ts_type)
+    filesystem = _archive_filesystem(bucket)
+    tables = []
+    total = 0
+    untyped = False
+    for table in _archive_row_groups(filesystem, bucket, archive_partition_prefixes(prefix, start, end)):
+        # Partitions are hour-granular, so trim to the exact range when timestamps are typed
+        field_type = table.schema.field("@timestamp").type
+        if pa.types.is_timestamp(field_type):
+            index = table.schema.get_field_index("@timestamp")
+            table = table.set_column(index, "@timestamp", pc.cast(table["@timestamp"], ts_type))
+            ts = table["@timestamp"]
+            table = table.filter(pc.and_(pc.greater_equal(ts, lower), pc.less_equal(ts, upper)))
+        else:
+            untyped = True
+        tables.append(table)
+        total += table.num_rows
+        if total > MAX_LOG_RECORDS:
+            logger.warning("S3 archive holds more than %d records in range; stopped reading", MAX_LOG_RECORDS)
+            break
+
+    logger.info("Read %d row groups from s3://%s/%s", len(tables), bucket, prefix)
+    if untyped:
+        logger.warning("Archive @timestamp column is not a timestamp type: rows were not trimmed to the range")
+    if not tables:
+        return []
+
+    table = pa.concat_tables(tables).sort_by("@timestamp")
+    ts = table["@timestamp"]
+    # Insights returns UTC timestamps as "YYYY-MM-DD HH:MM:SS.mmm"; %S carries the millis of a ms column
+    timestamps = (
+        pc.strftime(ts, format="%Y-%m-%d %H:%M:%S").to_pylist()
+        if pa.types.is_timestamp(ts.type)
+        else [str(value) for value in ts.to_pylist()]
+    )
+
+    logger.info("Retrieved %d records from S3 archive", table.num_rows)
+    return [
+        {"@timestamp": timestamp, "@message": message}
+        for timestamp, message in zip(timestamps, table["@message"].to_pylist())
+    ]
+
+
+def fetch_records(log_group: str, start: datetime, end: datetime, query: str) -> list[dict[str, str]]:
+    """
+    Fetch log records from the S3 archive when the group has one, otherwise via Insights.
+
+    The archive holds raw events only, so custom queries (filters, stats) always go
+    through Insights; the subscription filter leaves the data in CloudWatch as well.
+    """
+    if log_group in S3_LOG_ARCHIVES and query == DEFAULT_CW_SQL:
+        return fetch_records_via_s3(log_group, start, end)
+
+    return query_insights_cached(log_group, start, end, query=query)
+
+
 def create_log_chunks(all_records: list[dict], chunk_size: int = CHUNK_SIZE) -> list[LogChunk]:
     """
     Split parsed log records into chunks for parallel processing.
@@ -188,13 +512,13 @@ def create_log_chunks(all_records: list[dict], chunk_size: int = CHUNK_SIZE) ->
     chunks = []
     total_chunks = (len(all_records) + chunk_size - 1) // chunk_size
 
-    for i in range(0, len(all_records), chunk_size):
-        chunk_logs = all_records[i : i + chunk_size]
-
+    records = iter(all_records)
+    while chunk_logs := list(islice(records, chunk_size)):
         start_ts = chunk_logs[0].get("@timestamp")
         end_ts = chunk_logs[-1].get("@timestamp")
 
-        chunk = LogChunk(
+        # Fields are built here, so skip validation: it would deep-copy every log dict
+        chunk = LogChunk.model_construct(
             chunk_index=len(chunks),
             total_chunks=total_chunks,
             chunk_size=len(chunk_logs),
@@ -204,12 +528,13 @@ def create_log_chunks(all_records: list[dict], chunk_size: int = CHUNK_SIZE) ->
         )
         chunks.append(chunk)
 
-    logger.info(f"Created {len(chunks)} chunks from {len(all_records)} records")
-    for chunk in chunks:
-        logger.info(
-            f"  Chunk {chunk.chunk_index + 1}/{chunk.total_chunks}: "
-            f"{chunk.chunk_size} records ({chunk.get_time_range_description()})"
-        )
+    logger.info("Created %d chunks from %d records", len(chunks), len(all_records))
+    if logger.isEnabledFor(logging.INFO):
+        for chunk in chunks:
+            logger.info(
+                "  Chunk %d/%d: %d records (%s)",
+                chunk.chunk_index + 1, chunk.total_chunks, chunk.chunk_size, chunk.get_time_range_description()
+            )
 
     return chunks
 
@@ -231,15 +556,16 @@ def analyze_chunk_with_worker(
     """
     start_time = time.time()
     chunk_id = f"Chunk {chunk.chunk_index + 1}/{chunk.total_chunks}"
+    chunk_time_range = chunk.get_time_range_description()
 
-    logger.info(f"[{chunk_id}] Starting worker analysis...")
+    logger.info("[%s] Starting worker analysis...", chunk_id)
 
     try:
         worker_prompt = WORKER_AGENT_PROMPT.format(
             chunk_index=chunk.chunk_index + 1,
             total_chunks=chunk.total_chunks,
             chunk_size=chunk.chunk_size,
-            time_range=chunk.get_time_range_description(),
+            time_range=chunk_time_range,
             question=question,
         )
 
@@ -255,17 +581,21 @@ def analyze_chunk_with_worker(
                 "log_group": log_group,
                 "chunk_index": chunk.chunk_index + 1,
                 "total_chunks": chunk.total_chunks,
-                "chunk_time_range": chunk.get_time_range_description(),
+                "chunk_time_range": chunk_time_range,
                 "chunk_size": chunk.chunk_size,
                 "global_time_range": global_metadata["period"],
                 "total_records_in_dataset": global_metadata["total_records"],
             },
-            "logs": chunk.logs,
+            # Repeated messages (same error from the same stack trace) are sent once with a count;
+            # stats rows are already aggregates and go through untouched
+            "logs": chunk.logs if global_metadata.get("aggregated") else collapse_duplicate_logs(chunk.logs),
         }
 
-        context_json = json.dumps(chunk_context)
-        context_bytes, context_size_kb, _ = calculate_payload_size(chunk_context)
-        logger.info(f"[{chunk_id}] Payload size: {context_size_kb:.2f} KB ({context_bytes:,} bytes)")
+        context_blob = orjson.dumps(chunk_context)
+        context_json = context_blob.decode()
+        if logger.isEnabledFor(logging.INFO):
+            context_bytes, context_size_kb, _ = calculate_payload_size(context_blob)
+            logger.info("[%s] Payload size: %.2f KB (%s bytes)", chunk_id, context_size_kb, format(context_bytes, ","))
 
         prompt = [
             {"text": f"Question: {question}"},
@@ -273,15 +603,19 @@ def analyze_chunk_with_worker(
             {"text": "Analyze this chunk of logs according to the guidelines in your system prompt."},
         ]
 
+        waited = model_token_bucket.acquire(len(context_blob) // APPROX_BYTES_PER_TOKEN)
+        if waited:
+            logger.info("[%s] Waited %.2fs for model token budget", chunk_id, waited)
+
         result = worker_agent(prompt=prompt)
         analysis = str(result)  # Convert AgentResult to string
 
         processing_time = time.time() - start_time
-        logger.info(f"[{chunk_id}] Completed in {processing_time:.2f}s")
+        logger.info("[%s] Completed in %.2fs", chunk_id, processing_time)
 
         return ChunkAnalysisResult(
             chunk_index=chunk.chunk_index,
-            chunk_time_range=chunk.get_time_range_description(),
+            chunk_time_range=chunk_time_range,
             chunk_size=chunk.chunk_size,
             analysis=analysis,
             success=True,
@@ -291,11 +625,11 @@ def analyze_chunk_with_worker(
     except Exception as e:
         processing_time = time.time() - start_time
         error_msg = f"{type(e).__name__}: {str(e)}"
-        logger.error(f"[{chunk_id}] Failed after {processing_time:.2f}s: {error_msg}")
+        logger.error("[%s] Failed after %.2fs: %s", chunk_id, processing_time, error_msg)
 
         return ChunkAnalysisResult(
             chunk_index=chunk.chunk_index,
-            chunk_time_range=chunk.get_time_range_description(),
+            chunk_time_range=chunk_time_range,
             chunk_size=chunk.chunk_size,
             analysis="",
             success=False,
@@ -304,6 +638,28 @@ def analyze_chunk_with_worker(
         )
 
 
+def _analyze_chunk_safely(
+    chunk: LogChunk, question: str, log_group: str, global_metadata: dict
+) -> ChunkAnalysisResult:
+    """
+    analyze_chunk_with_worker that turns unexpected errors into a failed result,
+    so one chunk can never abort the others.
+    """
+    try:
+        return analyze_chunk_with_worker(chunk, question, log_group, global_metadata)
+    except Exception as e:
+        logger.error("Unexpected error processing chunk %d: %s", chunk.chunk_index + 1, e)
+        return ChunkAnalysisResult(
+            chunk_index=chunk.chunk_index,
+            chunk_time_range=chunk.get_time_range_description(),
+            chunk_size=chunk.chunk_size,
+            analysis="",
+            success=False,
+            error_message=f"Unexpected error: {str(e)}",
+            processing_time_seconds=0.0,
+        )
+
+
 def consolidate_with_coordinator(
     chunk_results: list[ChunkAnalysisResult],
     question: str,
@@ -324,7 +680,7 @@ def consolidate_with_coordinator(
         total_records: Total number of log records
 
     Returns:
-        Final consolidated analysis as string
+        Final consolidated analysis as string, or the labelled worker analysis when only one chunk succeeded
     """
     logger.info("Starting coordinator consolidation...")
 
@@ -337,10 +693,27 @@ def consolidate_with_coordinator(
         )
         return f"ERROR: All chunks failed to process.\n\nFailures:\n{error_summary}"
 
+    # A single analysis has nothing to synthesize; skip the coordinator round-trip but label the
+    # worker's output as such, since it only covers its own chunk rather than the whole question
+    if len(successful_results) == 1:
+        logger.info("Only one successful chunk - skipping coordinator")
+        only = successful_results[0]
+        analysis = (
+            f"## Worker analysis of chunk {only.chunk_index + 1} of {len(chunk_results)} (not consolidated)\n"
+            f"Covers {only.chunk_time_range}: {only.chunk_size} of {total_records} records in {log_group}.\n\n"
+            f"{only.analysis}"
+        )
+        if failed_results:
+            failures = "\n".join(f"- Chunk {r.chunk_index + 1}: {r.error_message}" for r in failed_results)
+            analysis += f"\n\n## Limitations\n{len(failed_results)} of {len(chunk_results)} chunks failed:\n{failures}"
+        return analysis
+
+    period_str = f"{start.isoformat()} to {end.isoformat()}"
+
     coordinator_prompt = COORDINATOR_AGENT_PROMPT.format(
         chunks_processed=len(successful_results),
         total_records=total_records,
-        time_range=f"{start.isoformat()} to {end.isoformat()}",
+        time_range=period_str,
         total_chunks=len(chunk_results),
     )
 
@@ -351,39 +724,33 @@ def consolidate_with_coordinator(
         read_timeout=WORKER_TIMEOUT_SECONDS,
     )
 
-    coordinator_context = {
-        "metadata": {
-            "log_group": log_group,
-            "time_range": f"{start.isoformat()} to {end.isoformat()}",
-            "total_records": total_records,
-            "total_chunks": len(chunk_results),
-            "successful_chunks": len(successful_results),
-            "failed_chunks": len(failed_results),
-        },
-        "chunk_analyses": [
-            {
-                "chunk_index": r.chunk_index + 1,
-                "time_range": r.chunk_time_range,
-                "size": r.chunk_size,
-                "analysis": r.analysis,
-                "processing_time": f"{r.processing_time_seconds:.2f}s",
-            }
-            for r in successful_results
-        ],
-    }
-
+    # Analyses are markdown already; embedding them in JSON would escape every quote and newline.
+    # Top-level headings keep each worker's own ## sections nested under its chunk.
+    sections = [
+        f"# Metadata\n"
+        f"- Log group: {log_group}\n"
+        f"- Time range: {period_str}\n"
+        f"- Total records: {total_records}\n"
+        f"- Chunks: {len(successful_results)} of {len(chunk_results)} succeeded, {len(failed_results)} failed"
+    ]
+    sections.extend(
+        f"# Chunk {r.chunk_index + 1} ({r.chunk_time_range}, {r.chunk_size} records, "
+        f"{r.processing_time_seconds:.2f}s)\n{r.analysis}"
+        for r in successful_results
+    )
     if failed_results:
-        coordinator_context["failed_chunks"] = [
-            {"chunk_index": r.chunk_index + 1, "error": r.error_message} for r in failed_results
-        ]
+        sections.append(
+            "# Failed Chunks\n" + "\n".join(f"- Chunk {r.chunk_index + 1}: {r.error_message}" for r in failed_results)
+        )
+    coordinator_context = "\n\n".join(sections)
 
-    context_json = json.dumps(coordinator_context)
-    context_bytes, context_size_kb, _ = calculate_payload_size(coordinator_context)
-    logger.info(f"Coordinator payload size: {context_size_kb:.2f} KB ({context_bytes:,} bytes)")
+    if logger.isEnabledFor(logging.INFO):
+        context_bytes, context_size_kb, _ = calculate_payload_size(coordinator_context.encode("utf-8"))
+        logger.info("Coordinator payload size: %.2f KB (%s bytes)", context_size_kb, format(context_bytes, ","))
 
     prompt = [
         {"text": f"Original Question: {question}"},
-        {"text": f"Chunk Analyses: {context_json}"},
+        {"text": f"Chunk Analyses:\n\n{coordinator_context}"},
         {"text": "Synthesize these chunk analyses to answer the user's question."},
     ]
 
@@ -412,39 +779,61 @@ def ask_to_log_parallel(
         end: End datetime for query
         cloudwatch_sql: CloudWatch Insights query string (default: DEFAULT_CW_SQL)
         chunk_size: Number of logs per chunk (default: 5000)
-        max_workers: Maximum parallel workers (default: 5)
+        max_workers: Maximum parallel workers (default: 20)
 
     Returns:
         tuple: (analysis_text, metadata_dict)
     """
     overall_start = time.time()
 
-    logger.info(f"Logging from group: {log_group}. Period: {start} to {end}")
-    logger.info(f"Using parallel processing: chunk_size={chunk_size}, max_workers={max_workers}")
+    logger.info("Logging from group: %s. Period: %s to %s", log_group, start, end)
+    logger.info("Using parallel processing: chunk_size=%d, max_workers=%d", chunk_size, max_workers)
 
-    all_records = query_chunk_recursively(
+    all_logs = fetch_records(
         log_group, start, end, query=cloudwatch_sql
     )
 
-    total_count = len(all_records)
-    logger.info(f"Total records retrieved: {total_count}")
+    total_count = len(all_logs)
+    logger.info("Total records retrieved: %d", total_count)
 
     if total_count == 0:
         logger.warning("No records found for the specified time range")
         return create_empty_result_metadata()
 
+    return _analyze_in_parallel(
+        all_logs, log_group, question, start, end, chunk_size, max_workers, overall_start,
+        cloudwatch_sql=cloudwatch_sql,
+    )
+
+
+def _analyze_in_parallel(
+    all_logs: list[dict[str, str]],
+    log_group: str,
+    question: str,
+    start: datetime,
+    end: datetime,
+    chunk_size: int,
+    max_workers: int,
+    overall_start: float,
+    cloudwatch_sql: str = DEFAULT_CW_SQL,
+) -> tuple[str, dict]:
+    """
+    Chunk already fetched logs and run the worker-coordinator analysis over them.
+    """
+    total_count = len(all_logs)
+
     if total_count > 10000:
         logger.warning(
-            f"Analyzing {total_count} records using parallel processing. "
-            f"This will create ~{(total_count + chunk_size - 1) // chunk_size} chunks."
+            "Analyzing %d records using parallel processing. This will create ~%d chunks.",
+            total_count, (total_count + chunk_size - 1) // chunk_size
         )
 
-    all_logs = [parse_log_entry(r) for r in all_records]
-
+    period_str = f"{start.isoformat()} to {end.isoformat()}"
     global_metadata = {
         "log_group": log_group,
-        "period": f"{start.isoformat()} to {end.isoformat()}",
+        "period": period_str,
         "total_records": total_count,
+        "aggregated": is_aggregation_query(cloudwatch_sql),
     }
 
     chunks = create_log_chunks(all_logs, chunk_size=chunk_size)
@@ -474,37 +863,15 @@ def ask_to_log_parallel(
 
     if len(chunks) == 1:
         logger.info("Only one chunk - using single-agent processing instead")
-        return ask_to_log(log_group, question, start, end, cloudwatch_sql=cloudwatch_sql)
+        return _analyze_with_single_agent(all_logs, log_group, question, start, end)
 
-    logger.info(f"Processing {len(chunks)} chunks with up to {max_workers} parallel workers...")
-    chunk_results = []
+    logger.info("Processing %d chunks with up to %d parallel workers...", len(chunks), max_workers)
 
+    # map() yields results in chunk order, so no reordering is needed afterwards
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_chunk = {
-            executor.submit(analyze_chunk_with_worker, chunk, question, log_group, global_metadata): chunk
-            for chunk in chunks
-        }
-
-        for future in as_completed(future_to_chunk):
-            chunk = future_to_chunk[future]
-            try:
-                result = future.result()
-                chunk_results.append(result)
-            except Exception as e:
-                logger.error(f"Unexpected error processing chunk {chunk.chunk_index + 1}: {e}")
-                chunk_results.append(
-                    ChunkAnalysisResult(
-                        chunk_index=chunk.chunk_index,
-                        chunk_time_range=chunk.get_time_range_description(),
-                        chunk_size=chunk.chunk_size,
-                        analysis="",
-                        success=False,
-                        error_message=f"Unexpected error: {str(e)}",
-                        processing_time_seconds=0.0,
-                    )
-                )
-
-    chunk_results.sort(key=lambda r: r.chunk_index)
+        chunk_results = list(executor.map(
+            _analyze_chunk_safely, chunks, repeat(question), repeat(log_group), repeat(global_metadata)
+        ))
 
     logger.info("All chunks processed. Starting consolidation...")
     final_analysis = consolidate_with_coordinator(
@@ -515,17 +882,17 @@ def ask_to_log_parallel(
     successful = sum(1 for r in chunk_results if r.success)
     failed = sum(1 for r in chunk_results if not r.success)
 
-    logger.info(f"\n=== Processing Summary ===")
-    logger.info(f"Total records: {total_count}")
-    logger.info(f"Chunks processed: {successful}/{len(chunks)}")
+    logger.info("\n=== Processing Summary ===")
+    logger.info("Total records: %d", total_count)
+    logger.info("Chunks processed: %d/%d", successful, len(chunks))
     if failed > 0:
-        logger.warning(f"Chunks failed: {failed}")
-    logger.info(f"Total processing time: {total_time:.2f}s")
+        logger.warning("Chunks failed: %d", failed)
+    logger.info("Total processing time: %.2fs", total_time)
     logger.info(
-        f"Average time per chunk: {sum(r.processing_time_seconds for r in chunk_results) / len(chunk_results):.2f}s"
+        "Average time per chunk: %.2fs", sum(r.processing_time_seconds for r in chunk_results) / len(chunk_results)
     )
 
-    logger.info(f"\n=== AI Analysis ===")
+    logger.info("\n=== AI Analysis ===")
 
     metadata = {
         "chunks_processed": successful,
@@ -558,17 +925,19 @@ def ask_to_log(
     Returns:
         tuple: (analysis_text, metadata_dict)
     """
-    logger.info(f"Logging from group: {log_group}. Period: {start} to {end}")
+    logger.info("Logging from group: %s. Period: %s to %s", log_group, start, end)
+
+    overall_start = time.time()
 
-    all_records = query_chunk_recursively(
+    all_logs = fetch_records(
         log_group,
         start,
         end,
         query=cloudwatch_sql
     )
 
-    total_count = len(all_records)
-    logger.info(f"Total records retrieved: {total_count}")
+    total_count = len(all_logs)
+    logger.info("Total records retrieved: %d", total_count)
 
     if total_count == 0:
         logger.warning("No records found for the specified time range")
@@ -587,7 +956,7 @@ def ask_to_log(
                 f"  - Increase MAX_CHUNKS_TO_PROCESS (currently {MAX_CHUNKS_TO_PROCESS})\n"
                 f"  - Current chunk size: {CHUNK_SIZE} records"
             )
-            logger.error(f"Dataset would generate {estimated_chunks} chunks, exceeding limit of {MAX_CHUNKS_TO_PROCESS}")
+            logger.error("Dataset would generate %d chunks, exceeding limit of %d", estimated_chunks, MAX_CHUNKS_TO_PROCESS)
             return (
                 f"ERROR: {error_msg}",
                 {
@@ -600,18 +969,34 @@ def ask_to_log(
             )
 
         logger.info(
-            f"Large dataset ({total_count} records > {CHUNK_SIZE}), routing to parallel processing"
+            "Large dataset (%d records > %d), routing to parallel processing", total_count, CHUNK_SIZE
         )
-        return ask_to_log_parallel(log_group, question, start, end, cloudwatch_sql=cloudwatch_sql)
+        # Hand over the logs already in memory instead of querying the range again
+        logger.info("Using parallel processing: chunk_size=%d, max_workers=%d", CHUNK_SIZE, MAX_PARALLEL_WORKERS)
+        return _analyze_in_parallel(
+            all_logs, log_group, question, start, end, CHUNK_SIZE, MAX_PARALLEL_WORKERS, overall_start,
+            cloudwatch_sql=cloudwatch_sql,
+        )
+
+    logger.info("Small dataset (%d records <= %d), using single agent", total_count, CHUNK_SIZE)
+    return _analyze_with_single_agent(all_logs, log_group, question, start, end)
 
-    logger.info(f"Small dataset ({total_count} records <= {CHUNK_SIZE}), using single agent")
+
+def _analyze_with_single_agent(
+    all_logs: list[dict[str, str]],
+    log_group: str,
+    question: str,
+    start: datetime,
+    end: datetime,
+) -> tuple[str, dict]:
+    """
+    Answer the question with one triage agent over already fetched logs.
+    """
+    total_count = len(all_logs)
 
     # Warning for large datasets
     if total_count > 1000:
-        logger.warning(f"Analyzing {total_count} records. This may be expensive and slow.")
-
-    # Parse all records for analysis
-    all_logs = [parse_log_entry(r) for r in all_records]
+        logger.warning("Analyzing %d records. This may be expensive and slow.", total_count)
 
     context = {
         "metadata": {
@@ -622,14 +1007,16 @@ def ask_to_log(
         "logs": all_logs
     }
 
-    # Calculate payload size
-    context_json = json.dumps(context)
-    context_bytes, context_size_kb, context_size_mb = calculate_payload_size(context)
+    context_blob = orjson.dumps(context)
+    context_json = context_blob.decode()
 
-    if context_size_mb >= 1:
-        logger.info(f"Payload size to Claude: {context_size_mb:.2f} MB ({context_bytes:,} bytes)")
-    else:
-        logger.info(f"Payload size to Claude: {context_size_kb:.2f} KB ({context_bytes:,} bytes)")
+    # Calculate payload size
+    if logger.isEnabledFor(logging.INFO):
+        context_bytes, context_size_kb, context_size_mb = calculate_payload_size(context_blob)
+        if context_size_mb >= 1:
+            logger.info("Payload size to Claude: %.2f MB (%s bytes)", context_size_mb, format(context_bytes, ","))
+        else:
+            logger.info("Payload size to Claude: %.2f KB (%s bytes)", context_size_kb, format(context_bytes, ","))
 
     agent = create_agent(
         system_prompt=TRIAGE_PROMPT,
@@ -643,7 +1030,7 @@ def ask_to_log(
         {"text": "Answer the question based on the log data provided."}
     ]
     result = agent(prompt=prompt)
-    logger.info(f"\n=== AI Analysis ===")
+    logger.info("\n=== AI Analysis ===")
 
     analysis = str(result)  # Convert AgentResult to string
 
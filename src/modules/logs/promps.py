@@ -52,13 +52,16 @@ that is part of a larger dataset being processed in parallel.
 **Your Role:**
 - You are analyzing chunk {chunk_index} of {total_chunks} total chunks
 - This chunk contains {chunk_size} log entries from the time range: {time_range}
+- Identical messages are collapsed: each entry has a `sample` (the first occurrence) and a
+  `count` field indicating how often that message appears in this chunk. Results of `stats`
+  queries are already aggregated and are sent as plain rows instead
 - Focus on extracting key insights, patterns, and anomalies from YOUR chunk only
 - DO NOT try to answer the user's question completely - that will be done by a coordinator
 
 **Analysis Guidelines:**
 1. Identify errors, warnings, and critical events in this chunk
 2. Note any recurring patterns or anomalies
-3. Extract relevant metrics (counts, durations, status codes, etc.)
+3. Extract relevant metrics (counts, durations, status codes, etc.) - weigh entries by their `count`
 4. Highlight anything that seems relevant to the user's question
 5. Be concise but thorough - your analysis will be combined with other chunks
 
@@ -2,7 +2,14 @@
 
 import re
 from datetime import datetime, timedelta, timezone
-from typing import Tuple
+from functools import lru_cache
+from typing import Callable, List, Optional, Tuple
+
+# Unit captured by _LAST_N_RE -> timedelta keyword argument
+_UNIT_KW = {"minute": "minutes", "hour": "hours", "day": "days", "week": "weeks"}
+
+# The unit alternation comes from _UNIT_KW so every captured unit has a mapping
+_LAST_N_RE = re.compile(rf"last\s+(\d+)\s+({'|'.join(_UNIT_KW)})s?")
 
 
 def parse_time_range(time_str: str) -> Tuple[datetime, datetime]:
@@ -24,44 +31,18 @@ def parse_time_range(time_str: str) -> Tuple[datetime, datetime]:
     Raises:
         ValueError: If time string cannot be parsed
     """
-    time_str = time_str.strip().lower()
+    # strip() returns the same object when there is nothing to trim; only lowercase when needed
+    time_str = time_str.strip()
+    if not time_str.islower():
+        time_str = time_str.lower()
     now = datetime.now(timezone.utc)
 
-    # Pattern: "last N hours/days/weeks/minutes"
-    match = re.match(r"last\s+(\d+)\s+(hour|day|week|minute)s?", time_str)
-    if match:
-        value = int(match.group(1))
-        unit = match.group(2)
-
-        delta_map = {
-            "minute": timedelta(minutes=value),
-            "hour": timedelta(hours=value),
-            "day": timedelta(days=value),
-            "week": timedelta(weeks=value),
-        }
-
-        return now - delta_map[unit], now
-
-    # Pattern: "since yesterday"
-    if "since yesterday" in time_str:
-        yesterday_start = (now - timedelta(days=1)).replace(
-            hour=0, minute=0, second=0, microsecond=0
-        )
-        return yesterday_start, now
-
-    # Pattern: "since today"
-    if "since today" in time_str:
-        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        return today_start, now
-
-    # Pattern: "YYYY-MM-DD to YYYY-MM-DD" or "ISO to ISO"
-    if " to " in time_str:
-        parts = time_str.split(" to ")
-        if len(parts) == 2:
-            start_str, end_str = parts
-            start_dt = _parse_single_datetime(start_str.strip())
-            end_dt = _parse_single_datetime(end_str.strip())
-            return start_dt, end_dt
+    for matches, handler in _DISPATCH:
+        if matches(time_str):
+            parsed = handler(time_str, now)
+            if parsed is not None:
+                return parsed
+            break
 
     raise ValueError(
         f"Cannot parse time range: '{time_str}'. "
@@ -70,6 +51,70 @@ def parse_time_range(time_str: str) -> Tuple[datetime, datetime]:
     )
 
 
+def _handle_last_n(time_str: str, now: datetime) -> Optional[Tuple[datetime, datetime]]:
+    """Pattern: "last N hours/days/weeks/minutes"."""
+    match = _LAST_N_RE.match(time_str)
+    if not match:
+        return None
+
+    value = int(match.group(1))
+    unit = match.group(2)
+    return now - timedelta(**{_UNIT_KW[unit]: value}), now
+
+
+def _handle_since_yesterday(time_str: str, now: datetime) -> Tuple[datetime, datetime]:
+    """Pattern: "since yesterday"."""
+    yesterday = now - timedelta(days=1)
+    return datetime(yesterday.year, yesterday.month, yesterday.day, tzinfo=timezone.utc), now
+
+
+def _handle_since_today(time_str: str, now: datetime) -> Tuple[datetime, datetime]:
+    """Pattern: "since today"."""
+    return datetime(now.year, now.month, now.day, tzinfo=timezone.utc), now
+
+
+def _handle_absolute_range(time_str: str, now: datetime) -> Optional[Tuple[datetime, datetime]]:
+    """Pattern: "YYYY-MM-DD to YYYY-MM-DD" or "ISO to ISO"."""
+    return _parse_absolute_range(time_str)
+
+
+# (matcher, handler) pairs tried in order; the first matcher that accepts the
+# normalized string owns it, and a handler returning None means "unparseable".
+_DISPATCH: List[Tuple[Callable[[str], bool], Callable[[str, datetime], Optional[Tuple[datetime, datetime]]]]] = [
+    (lambda s: s.startswith("last "), _handle_last_n),
+    (lambda s: s.startswith("since yesterday"), _handle_since_yesterday),
+    (lambda s: s.startswith("since today"), _handle_since_today),
+    (lambda s: " to " in s, _handle_absolute_range),
+]
+
+
+@lru_cache(maxsize=256)
+def _parse_absolute_range(time_str: str) -> Optional[Tuple[datetime, datetime]]:
+    """
+    Parse a "<datetime> to <datetime>" range.
+
+    Unlike the relative formats this does not depend on the current time, so
+    results are cached for saved queries that re-run the same range.
+
+    Args:
+        time_str: Normalized (stripped, lowercased) time range
+
+    Returns:
+        Tuple of (start_datetime, end_datetime), or None if the string does not
+        split into exactly two parts
+
+    Raises:
+        ValueError: If either side cannot be parsed
+    """
+    parts = time_str.split(" to ")
+    if len(parts) != 2:
+        return None
+
+    start_str, end_str = parts
+    return _parse_single_datetime(start_str.strip()), _parse_single_datetime(end_str.strip())
+
+
+@lru_cache(maxsize=512)
 def _parse_single_datetime(dt_str: str) -> datetime:
     """
     Parse a single datetime string (used internally by parse_time_range).
@@ -83,7 +128,15 @@ def _parse_single_datetime(dt_str: str) -> datetime:
     Raises:
         ValueError: If datetime string cannot be parsed
     """
-    # Try ISO format with time (both with and without 'T' separator)
+    # fromisoformat covers the zero-padded forms callers send; the input was lowercased, so restore the 'T'
+    iso_str = dt_str[:10] + "T" + dt_str[11:] if len(dt_str) > 10 and dt_str[10] == "t" else dt_str
+    try:
+        dt = datetime.fromisoformat(iso_str)
+        return dt.astimezone(timezone.utc) if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+    except ValueError:
+        pass
+
+    # Fall back to strptime for non-padded variants such as 2025-1-5
     for fmt in [
         "%Y-%m-%dt%H:%M:%S",  # 2025-12-14t10:00:00
         "%Y-%m-%d %H:%M:%S",  # 2025-12-14 10:00:00
@@ -1,10 +1,9 @@
+import asyncio
 import logging
 from datetime import datetime
+from functools import lru_cache
+from typing import TYPE_CHECKING
 
-from claude_code_sdk import ClaudeCodeOptions, query
-from git import Repo
-from github import Github
-from pydantic import BaseModel, Field
 from strands import tool
 
 from modules.ai.agent_factory import create_agent
@@ -12,6 +11,10 @@ from modules.logs.models import PrTitleModel, LogEntry
 from modules.logs.promps import PR_PROMPT
 from settings import GITHUB_TOKEN, Models, GITHUB_REPO, WORK_DIR
 
+if TYPE_CHECKING:
+    from git import Repo
+    from github.Repository import Repository
+
 logger = logging.getLogger(__name__)
 
 
@@ -36,24 +39,30 @@ def pr_title_generator(response: str) -> PrTitleModel:
     return result.structured_output
 
 
-def _setup_repo() -> Repo:
-    """Clone repo if not exists, otherwise pull latest changes."""
-    repo_url = get_authenticated_repo_url()
+def _setup_repo(repo_url: str) -> "Repo":
+    """Shallow-clone main if the repo does not exist, otherwise reset it to the tip of remote main."""
+    from git import Repo
+
     git_dir = WORK_DIR / ".git"
     if git_dir.exists():
         repo = Repo(WORK_DIR)
-        repo.git.pull(repo_url)
+        repo.git.fetch(repo_url, "main", depth=1)
+        repo.git.checkout("-f", "-B", "main", "FETCH_HEAD")
     else:
-        repo = Repo.clone_from(repo_url, WORK_DIR)
+        repo = Repo.clone_from(repo_url, WORK_DIR, depth=1, single_branch=True, branch="main")
     return repo
 
 
-def _create_fix_branch(repo: Repo, error: LogEntry) -> str | None:
+def _create_fix_branch(repo: "Repo", error: LogEntry, repo_url: str) -> str | None:
     """Create fix branch. Returns None if branch already exists remotely."""
-    branch_name = f"autofix/{error.fix_short_name}_{error.timestamp.strftime('%Y%m%d-%H%M%S')}"
+    t = error.timestamp
+    branch_name = (
+        f"autofix/{error.fix_short_name}_"
+        f"{t.year:04d}{t.month:02d}{t.day:02d}-{t.hour:02d}{t.minute:02d}{t.second:02d}"
+    )
 
-    remote_refs = [ref.name for ref in repo.remote().refs]
-    if f"origin/{branch_name}" in remote_refs:
+    # A single-branch clone has no remote-tracking refs for fix branches, so ask the URL we push to
+    if repo.git.ls_remote("--heads", repo_url, branch_name):
         logger.info(f"Branch {branch_name} already exists, skipping")
         return None
 
@@ -64,33 +73,46 @@ def _create_fix_branch(repo: Repo, error: LogEntry) -> str | None:
 
 async def _invoke_claude_fix(error_message: str) -> str | None:
     """Invoke Claude Code SDK to fix the error. Returns response or None on failure."""
+    from claude_code_sdk import ClaudeCodeOptions, ResultMessage, query
+
     prompt = f"Fix this error in the codebase: {error_message}"
     options = ClaudeCodeOptions(
         cwd=str(WORK_DIR),
         allowed_tools=["Read", "Edit"]
     )
-    response = None
-    async for response in query(prompt=prompt, options=options):
-        logger.info(f"Claude response: {response}")
-
-    if response is None:
+    result = None
+    log_messages = logger.isEnabledFor(logging.INFO)
+    # Drain the stream rather than breaking on the ResultMessage so the SDK can shut its CLI process down cleanly
+    async for message in query(prompt=prompt, options=options):
+        if log_messages:
+            logger.info("Claude response: %s", message)
+        if isinstance(message, ResultMessage):
+            result = message
+
+    if result is None:
         logger.error("No response from Claude Code SDK")
         return None
 
-    return response.result
+    return result.result
 
 
-def _commit_and_push(repo: Repo, branch_name: str, pr_info: PrTitleModel) -> None:
+def _commit_and_push(repo: "Repo", branch_name: str, pr_info: PrTitleModel, repo_url: str) -> None:
     """Commit all changes and push to remote."""
     repo.git.add(A=True)
     repo.index.commit(pr_info.pr_title)
-    repo.git.push(get_authenticated_repo_url(), branch_name)
+    repo.git.push(repo_url, branch_name)
 
 
-def _create_pull_request(branch_name: str, pr_info: PrTitleModel) -> None:
+@lru_cache(maxsize=1)
+def _gh_repo() -> "Repository":
+    """GitHub repository handle, resolved once per process."""
+    from github import Github
+
+    return Github(GITHUB_TOKEN).get_repo(GITHUB_REPO)
+
+
+def _create_pull_request(gh_repo: "Repository", branch_name: str, pr_info: PrTitleModel) -> None:
     """Create GitHub pull request."""
-    gh = Github(GITHUB_TOKEN)
-    gh_repo = gh.get_repo(GITHUB_REPO)
     gh_repo.create_pull(
         title=pr_info.pr_title,
         body=pr_info.pr_description,
@@ -110,9 +132,14 @@ async def register_error_for_fix(error: LogEntry | dict) -> bool:
     logger.info(f"Registering error for fix: {error}")
 
     try:
-        repo = _setup_repo()
-
-        branch_name = _create_fix_branch(repo, error)
+        repo_url = get_authenticated_repo_url()
+        # Clone/pull and resolve the GitHub repo concurrently; both are network bound
+        repo, gh_repo = await asyncio.gather(
+            asyncio.to_thread(_setup_repo, repo_url),
+            asyncio.to_thread(_gh_repo),
+        )
+
+        branch_name = _create_fix_branch(repo, error, repo_url)
         if branch_name is None:
             return True
 
@@ -121,8 +148,8 @@ async def register_error_for_fix(error: LogEntry | dict) -> bool:
             return False
 
         pr_info = pr_title_generator(claude_response)
-        _commit_and_push(repo, branch_name, pr_info)
-        _create_pull_request(branch_name, pr_info)
+        _commit_and_push(repo, branch_name, pr_info, repo_url)
+        _create_pull_request(gh_repo, branch_name, pr_info)
 
         return True
 
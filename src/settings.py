@@ -1,3 +1,4 @@
+import json
 import os
 from enum import StrEnum
 from pathlib import Path
@@ -29,6 +30,15 @@ WORK_DIR = Path(BASE_DIR) / "tmp"
 
 # Parallel processing limits
 MAX_CHUNKS_TO_PROCESS = int(os.getenv("MAX_CHUNKS_TO_PROCESS", "5"))
+MODEL_TOKENS_PER_MINUTE = int(os.getenv("MODEL_TOKENS_PER_MINUTE", "200000"))
+
+# Log groups archived to S3 as Parquet (subscription filter -> Firehose), e.g.
+# {"/aws/lambda/my-fn": "s3://my-bucket/logs/my-fn"}. Listed groups skip Insights.
+S3_LOG_ARCHIVES: dict[str, str] = json.loads(os.getenv("S3_LOG_ARCHIVES", "{}"))
+
+# Insights results cache (0 disables it)
+INSIGHTS_CACHE_DIR = Path(os.getenv("INSIGHTS_CACHE_DIR", "/tmp/insights_cache"))
+INSIGHTS_CACHE_TTL_SECONDS = int(os.getenv("INSIGHTS_CACHE_TTL_SECONDS", "3600"))
 
 
 class Models(StrEnum):
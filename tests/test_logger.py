@@ -0,0 +1,299 @@
+"""Tests for logging formatters, handlers and setup."""
+
+import json
+import logging
+import sys
+import time
+from logging.handlers import QueueHandler
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+import lib.logger
+from lib.logger import (
+    BufferedRotatingFileHandler,
+    CachedTimeFormatter,
+    CloudWatchJsonFormatter,
+    ConsoleFormatter,
+    setup_logging,
+)
+
+
+def make_record(created: float, msg: str = "Test message", level: int = logging.INFO) -> logging.LogRecord:
+    """Build a LogRecord with a fixed creation time."""
+    record = logging.LogRecord("test", level, __file__, 1, msg, None, None)
+    record.created = created
+    record.msecs = (created - int(created)) * 1000
+    return record
+
+
+class TestCloudWatchJsonFormatter:
+    """Tests for CloudWatchJsonFormatter."""
+
+    def test_timestamp_is_utc_with_milliseconds(self) -> None:
+        """Test that @timestamp is ISO formatted in UTC with millisecond precision."""
+        formatter = CloudWatchJsonFormatter(app="app", process="proc", fmt="%(message)s")
+
+        result = json.loads(formatter.format(make_record(1736942400.25)))
+
+        assert result["@timestamp"] == "2025-01-15T12:00:00.250Z"
+
+    def test_cached_second_is_not_reused_for_next_second(self) -> None:
+        """Test that the cached prefix is refreshed when the second changes."""
+        formatter = CloudWatchJsonFormatter(app="app", process="proc", fmt="%(message)s")
+
+        first = json.loads(formatter.format(make_record(1736942400.5)))
+        second = json.loads(formatter.format(make_record(1736942401.5)))
+
+        assert first["@timestamp"] == "2025-01-15T12:00:00.500Z"
+        assert second["@timestamp"] == "2025-01-15T12:00:01.500Z"
+
+    def test_metadata_fields(self) -> None:
+        """Test that CloudWatch metadata fields are added."""
+        formatter = CloudWatchJsonFormatter(app="app", process="proc", fmt="%(message)s")
+
+        result = json.loads(formatter.format(make_record(1736942400.0)))
+
+        assert result["app"] == "app"
+        assert result["process"] == "proc"
+        assert result["level"] == "INFO"
+        assert result["logger"] == "test"
+        assert result["message"] == "Test message"
+
+
+class TestConsoleFormatter:
+    """Tests for ConsoleFormatter."""
+
+    def test_without_extras(self) -> None:
+        """Test that records without extras are formatted unchanged."""
+        formatter = ConsoleFormatter(fmt="%(message)s")
+
+        result = formatter.format(make_record(1736942400.0))
+
+        assert result == "Test message"
+
+    def test_appends_single_extra(self) -> None:
+        """Test that a single extra field is appended after the message."""
+        formatter = ConsoleFormatter(fmt="%(message)s")
+        record = make_record(1736942400.0)
+        record.user = "alice"
+
+        result = formatter.format(record)
+
+        assert result == "Test message | user=alice"
+
+    def test_appends_extras(self) -> None:
+        """Test that extra fields are appended after the message in the order they were set."""
+        formatter = ConsoleFormatter(fmt="%(message)s")
+        record = make_record(1736942400.0)
+        record.user = "alice"
+        record.request_id = 42
+
+        result = formatter.format(record)
+
+        assert result == "Test message | user=alice request_id=42"
+
+
+class TestCachedTimeFormatter:
+    """Tests for CachedTimeFormatter."""
+
+    def test_matches_standard_formatter(self) -> None:
+        """Test that cached output matches logging.Formatter output."""
+        fmt = "%(asctime)s [%(levelname)s] %(message)s"
+        datefmt = "%d/%m/%Y %X"
+        cached = CachedTimeFormatter(fmt=fmt, datefmt=datefmt)
+        standard = logging.Formatter(fmt=fmt, datefmt=datefmt)
+
+        for created in (1736942400.1, 1736942400.9, 1736942401.2):
+            record = make_record(created)
+            assert cached.format(record) == standard.format(make_record(created))
+
+    def test_strftime_called_once_per_second(self) -> None:
+        """Test that formatted time is reused within the same second."""
+        formatter = CachedTimeFormatter(fmt="%(asctime)s", datefmt="%X")
+
+        with patch("logging.time.strftime", wraps=time.strftime) as strftime:
+            formatter.format(make_record(1736942400.1))
+            formatter.format(make_record(1736942400.7))
+            formatter.format(make_record(1736942401.1))
+
+        assert strftime.call_count == 2
+
+    def test_default_datefmt_keeps_milliseconds(self) -> None:
+        """Test that the default format (with milliseconds) is not cached."""
+        formatter = CachedTimeFormatter(fmt="%(asctime)s")
+
+        first = formatter.format(make_record(1736942400.1))
+        second = formatter.format(make_record(1736942400.7))
+
+        assert first != second
+
+
+@pytest.fixture
+def file_handler(tmp_path: Path):
+    """Hourly BufferedRotatingFileHandler writing bare messages to tmp_path/app.log."""
+    handler = BufferedRotatingFileHandler(tmp_path / "app.log", when="H", encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    yield handler
+    handler.close()
+
+
+class TestBufferedRotatingFileHandler:
+    """Tests for BufferedRotatingFileHandler."""
+
+    def test_info_is_buffered_until_flush(self, file_handler: BufferedRotatingFileHandler) -> None:
+        """Test that records below ERROR stay in the buffer until flushed."""
+        log_file = Path(file_handler.baseFilename)
+
+        file_handler.emit(make_record(time.time(), "buffered"))
+
+        assert log_file.read_text() == ""
+        file_handler.flush()
+        assert log_file.read_text() == "buffered\n"
+
+    def test_error_is_written_immediately(self, file_handler: BufferedRotatingFileHandler) -> None:
+        """Test that ERROR records are flushed to disk as soon as they are emitted."""
+        log_file = Path(file_handler.baseFilename)
+        file_handler.emit(make_record(time.time(), "before"))
+
+        file_handler.emit(make_record(time.time(), "failure", level=logging.ERROR))
+
+        assert log_file.read_text() == "before\nfailure\n"
+
+    def test_close_stops_flush_thread(self, file_handler: BufferedRotatingFileHandler) -> None:
+        """Test that closing the handler stops the periodic flush thread."""
+        thread = file_handler._flush_thread
+
+        file_handler.close()
+
+        assert not thread.is_alive()
+
+    def test_periodic_flush_writes_buffered_records(self, tmp_path: Path) -> None:
+        """Test that the flush thread writes buffered records without an explicit flush."""
+        handler = BufferedRotatingFileHandler(tmp_path / "app.log", when="H", encoding="utf-8", flush_interval=0.01)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        try:
+            handler.emit(make_record(time.time(), "buffered"))
+            deadline = time.monotonic() + 2
+            while (tmp_path / "app.log").read_text() == "" and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            handler.close()
+
+        assert (tmp_path / "app.log").read_text() == "buffered\n"
+
+    def test_open_honours_mode(self, file_handler: BufferedRotatingFileHandler) -> None:
+        """Test that the buffered stream is opened with the handler's mode."""
+        log_file = Path(file_handler.baseFilename)
+        log_file.write_text("stale\n")
+        file_handler.mode = "w"
+
+        stream = file_handler._open()
+        stream.close()
+
+        assert log_file.read_text() == ""
+
+    def test_rollover_rotates_file_and_opens_fresh_stream(
+        self, file_handler: BufferedRotatingFileHandler, tmp_path: Path
+    ) -> None:
+        """Test that a due rollover moves buffered output aside and writes to a new file."""
+        now = time.time()
+        file_handler.emit(make_record(now, "old"))
+        old_stream = file_handler.stream
+        file_handler.rolloverAt = int(now) - 1
+
+        file_handler.emit(make_record(now, "new"))
+        file_handler.flush()
+
+        rotated = [p for p in tmp_path.iterdir() if p.name != "app.log"]
+        assert len(rotated) == 1
+        assert rotated[0].read_text() == "old\n"
+        assert (tmp_path / "app.log").read_text() == "new\n"
+        assert file_handler.stream is not old_stream
+
+    def test_should_rollover_skips_clock_before_rollover_time(
+        self, file_handler: BufferedRotatingFileHandler
+    ) -> None:
+        """Test that records older than rolloverAt are rejected without reading the clock."""
+        record = make_record(file_handler.rolloverAt - 10)
+
+        with patch("logging.handlers.time") as clock:
+            result = file_handler.shouldRollover(record)
+
+        assert result is False
+        clock.time.assert_not_called()
+
+    def test_should_rollover_defers_to_base_check_when_due(
+        self, file_handler: BufferedRotatingFileHandler
+    ) -> None:
+        """Test that a record at or past rolloverAt goes through the base handler's check."""
+        record = make_record(file_handler.rolloverAt)
+
+        with patch("logging.handlers.time") as clock:
+            clock.time.return_value = file_handler.rolloverAt
+            result = file_handler.shouldRollover(record)
+
+        assert result is True
+        clock.time.assert_called_once()
+
+
+@pytest.fixture
+def fresh_logging(monkeypatch: pytest.MonkeyPatch):
+    """Let setup_logging run again, then restore the root logger and excepthook."""
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+    monkeypatch.setattr(lib.logger, "_CONFIGURED", False)
+    monkeypatch.setattr(lib.logger, "_listener", None)
+    monkeypatch.setattr(sys, "excepthook", sys.excepthook)
+
+    # The test stops the listener itself; atexit hooks would stop it a second time
+    with patch("lib.logger.atexit.register"):
+        yield
+
+    listener = lib.logger._listener
+    if listener is not None:
+        for handler in listener.handlers:
+            handler.close()
+    root.handlers[:] = saved_handlers
+    root.setLevel(saved_level)
+
+
+class TestSetupLogging:
+    """Tests for setup_logging."""
+
+    def test_production_routes_records_through_queue_listener(
+        self, fresh_logging: None, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        """Test that production logging enqueues records and the listener writes them to both handlers."""
+        log_path = tmp_path / "app.log"
+        setup_logging(env="production", app="autofix", log_path=log_path)
+        setup_logging(env="production", app="autofix", log_path=tmp_path / "second.log")
+        handlers = logging.getLogger().handlers
+
+        logger = logging.getLogger("tests.setup")
+        logger.info("job %s started", "sync", extra={"request_id": 42})
+        try:
+            raise ValueError("bad payload")
+        except ValueError:
+            logger.exception("job failed")
+        lib.logger._listener.stop()
+        for handler in lib.logger._listener.handlers:
+            handler.flush()
+
+        assert len(handlers) == 1
+        assert isinstance(handlers[0], QueueHandler)
+        assert not (tmp_path / "second.log").exists()
+
+        started, failed = [json.loads(line) for line in log_path.read_text().splitlines()]
+        assert started["message"] == "job sync started"
+        assert started["request_id"] == 42
+        assert started["app"] == "autofix"
+        assert started["logger"] == "tests.setup"
+        assert failed["level"] == "ERROR"
+        assert "Traceback" in failed["message"]
+        assert "ValueError: bad payload" in failed["message"]
+
+        console = capsys.readouterr().err
+        assert "job sync started | request_id=42" in console
+        assert "ValueError: bad payload" in console
@@ -1,16 +1,36 @@
 """Tests for utility functions in main module."""
 
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest.mock import MagicMock, patch
 
+import orjson
 import pytest
+from botocore.exceptions import ClientError
+from diskcache import Cache
 
 from modules.logs.main import (
+    CHUNK_SIZE,
+    DEFAULT_CW_SQL,
+    QUERY_POLL_INITIAL_DELAY,
+    QUERY_POLL_MAX_DELAY,
+    archive_partition_prefixes,
+    ask_to_log,
+    ask_to_log_parallel,
     calculate_payload_size,
+    collapse_duplicate_logs,
+    consolidate_with_coordinator,
     create_log_chunks,
     explain_query_status,
+    fetch_records,
+    fetch_records_via_s3,
+    is_aggregation_query,
     parse_log_entry,
+    query_chunk_recursively,
+    query_insights_cached,
     to_unix_seconds,
 )
+from modules.logs.models import ChunkAnalysisResult
 
 
 class TestToUnixSeconds:
@@ -79,46 +99,723 @@ class TestExplainQueryStatus:
         assert "unexpected" in result.lower()
 
 
+def fake_logs_client(fake_query) -> MagicMock:
+    """Logs client whose queries finish on the first poll with fake_query's result."""
+    client = MagicMock()
+    results = {}
+
+    def start_query(logGroupName, startTime, endTime, queryString, limit):
+        query_id = f"q{len(results)}"
+        start = datetime.fromtimestamp(startTime, timezone.utc)
+        end = datetime.fromtimestamp(endTime, timezone.utc)
+        results[query_id] = fake_query(logGroupName, start, end, queryString, limit)
+        return {"queryId": query_id}
+
+    def get_query_results(queryId):
+        status, rows = results[queryId]
+        return {"status": status, "results": rows}
+
+    client.start_query.side_effect = start_query
+    client.get_query_results.side_effect = get_query_results
+    return client
+
+
+class TestQueryPolling:
+    """Tests for polling in-flight Insights queries."""
+
+    def test_polls_with_capped_backoff(self) -> None:
+        """Test that polling delays grow and are capped at the maximum delay."""
+        client = MagicMock()
+        client.start_query.return_value = {"queryId": "qid"}
+        client.get_query_results.side_effect = [{"status": "Running"}] * 8 + [
+            {"status": "Complete", "results": [[{"field": "@message", "value": "x"}]]}
+        ]
+        start = datetime(2025, 1, 15, 10, 0, 0, tzinfo=timezone.utc)
+        end = datetime(2025, 1, 15, 11, 0, 0, tzinfo=timezone.utc)
+
+        with patch("modules.logs.main._logs_client", return_value=client), \
+                patch("modules.logs.main.time.sleep") as sleep:
+            rows = query_chunk_recursively("group", start, end, "fields @message")
+
+        delays = [call.args[0] for call in sleep.call_args_list]
+        assert rows == [{"@message": "x"}]
+        assert len(delays) == 8
+        assert QUERY_POLL_INITIAL_DELAY <= delays[0] < delays[1]
+        assert all(d <= QUERY_POLL_MAX_DELAY * 1.1 for d in delays)
+
+    def test_failed_status_returns_without_sleeping(self) -> None:
+        """Test that a terminal status on the first poll returns immediately."""
+        client = MagicMock()
+        client.start_query.return_value = {"queryId": "qid"}
+        client.get_query_results.return_value = {"status": "Failed"}
+        start = datetime(2025, 1, 15, 10, 0, 0, tzinfo=timezone.utc)
+
+        with patch("modules.logs.main._logs_client", return_value=client), \
+                patch("modules.logs.main.time.sleep") as sleep:
+            rows = query_chunk_recursively("group", start, start, "fields @message")
+
+        assert rows == []
+        sleep.assert_not_called()
+
+    def test_subdivisions_are_started_before_polling(self) -> None:
+        """Test that both halves of a full range are in flight at the same time."""
+        start = datetime(2025, 1, 15, 0, 0, 0, tzinfo=timezone.utc)
+        end = datetime(2025, 1, 15, 2, 0, 0, tzinfo=timezone.utc)
+
+        def fake_query(group, start, end, query, limit):
+            count = limit if (end - start).total_seconds() > 3600 else 1
+            return "Complete", [[{"field": "@message", "value": "x"}]] * count
+
+        client = fake_logs_client(fake_query)
+        with patch("modules.logs.main.MAX_RESULTS_PER_QUERY", 5), \
+                patch("modules.logs.main._logs_client", return_value=client):
+            query_chunk_recursively("group", start, end, "fields @message")
+
+        calls = [name for name, _, _ in client.method_calls]
+        assert calls == ["start_query", "get_query_results", "start_query", "start_query",
+                         "get_query_results", "get_query_results"]
+
+    def test_passes_that_finish_a_query_still_wait(self) -> None:
+        """Test that queries still running are not polled again without a pause after another finishes."""
+        start = datetime(2025, 1, 15, 0, 0, 0, tzinfo=timezone.utc)
+        end = datetime(2025, 1, 15, 2, 0, 0, tzinfo=timezone.utc)
+        full = [[{"field": "@message", "value": "x"}]] * 5
+        one = [[{"field": "@message", "value": "x"}]]
+        polls = {
+            "q0": [("Complete", full)],
+            "q1": [("Complete", one)],
+            "q2": [("Running", []), ("Complete", one)],
+        }
+        client = MagicMock()
+        client.start_query.side_effect = [{"queryId": f"q{i}"} for i in range(3)]
+        client.get_query_results.side_effect = lambda queryId: dict(
+            zip(("status", "results"), polls[queryId].pop(0))
+        )
+
+        with patch("modules.logs.main.MAX_RESULTS_PER_QUERY", 5), \
+                patch("modules.logs.main._logs_client", return_value=client), \
+                patch("modules.logs.main.time.sleep") as sleep:
+            rows = query_chunk_recursively("group", start, end, "fields @message")
+
+        delays = [call.args[0] for call in sleep.call_args_list]
+        assert len(rows) == 2
+        assert len(delays) == 2
+        assert all(d >= QUERY_POLL_INITIAL_DELAY for d in delays)
+
+    def test_start_error_is_skipped(self) -> None:
+        """Test that an API error starting a query yields no rows instead of raising."""
+        client = MagicMock()
+        client.start_query.side_effect = ClientError(
+            {"Error": {"Code": "LimitExceededException", "Message": "slow down"}}, "StartQuery"
+        )
+        start = datetime(2025, 1, 15, 10, 0, 0, tzinfo=timezone.utc)
+
+        with patch("modules.logs.main._logs_client", return_value=client):
+            rows = query_chunk_recursively("group", start, start, "fields @message")
+
+        assert rows == []
+        client.get_query_results.assert_not_called()
+
+
+class TestQueryChunkRecursively:
+    """Tests for query_chunk_recursively subdivision."""
+
+    @staticmethod
+    def fake_rows(start: datetime, count: int) -> list[list[dict]]:
+        """Rows tagged with their query range so ordering can be checked."""
+        return [[{"field": "@message", "value": f"{start.isoformat()}#{i}"}] for i in range(count)]
+
+    def test_returns_rows_without_subdividing(self) -> None:
+        """Test that a range under the limit is queried once."""
+        start = datetime(2025, 1, 15, 0, 0, 0, tzinfo=timezone.utc)
+        end = datetime(2025, 1, 15, 4, 0, 0, tzinfo=timezone.utc)
+
+        def fake_query(group, start, end, query, limit):
+            return "Complete", self.fake_rows(start, 2)
+
+        client = fake_logs_client(fake_query)
+        with patch("modules.logs.main._logs_client", return_value=client):
+            rows = query_chunk_recursively("group", start, end, "fields @message")
+
+        assert client.start_query.call_count == 1
+        assert len(rows) == 2
+
+    def test_returns_parsed_entries(self) -> None:
+        """Test that rows come back parsed, without the internal @ptr field."""
+        start = datetime(2025, 1, 15, 0, 0, 0, tzinfo=timezone.utc)
+        row = [{"field": "@message", "value": "boom"}, {"field": "@ptr", "value": "abc"}]
+
+        with patch("modules.logs.main._logs_client", return_value=fake_logs_client(lambda *args: ("Complete", [row]))):
+            rows = query_chunk_recursively("group", start, start, "fields @message")
+
+        assert rows == [{"@message": "boom"}]
+
+    def test_subdivides_full_ranges_in_time_order(self) -> None:
+        """Test that ranges hitting the limit are split and results stay chronological."""
+        start = datetime(2025, 1, 15, 0, 0, 0, tzinfo=timezone.utc)
+        end = datetime(2025, 1, 15, 4, 0, 0, tzinfo=timezone.utc)
+
+        def fake_query(group, start, end, query, limit):
+            # Anything longer than one hour is "full"
+            count = limit if (end - start).total_seconds() > 3600 else 2
+            return "Complete", self.fake_rows(start, count)
+
+        client = fake_logs_client(fake_query)
+        with patch("modules.logs.main.MAX_RESULTS_PER_QUERY", 5), \
+                patch("modules.logs.main._logs_client", return_value=client):
+            rows = query_chunk_recursively("group", start, end, "fields @message")
+
+        messages = [entry["@message"] for entry in rows]
+        assert client.start_query.call_count == 7  # 4h -> 2x2h -> 4x1h
+        assert len(messages) == 8
+        assert messages == sorted(messages)
+
+    def test_halves_do_not_overlap(self) -> None:
+        """Test that subdivided ranges split on whole seconds without sharing a boundary."""
+        start = datetime(2025, 1, 15, 0, 0, 0, tzinfo=timezone.utc)
+        end = datetime(2025, 1, 15, 0, 0, 9, tzinfo=timezone.utc)
+
+        def fake_query(group, start, end, query, limit):
+            return "Complete", self.fake_rows(start, limit if start.second == 0 and end.second == 9 else 1)
+
+        client = fake_logs_client(fake_query)
+        with patch("modules.logs.main.MAX_RESULTS_PER_QUERY", 5), \
+                patch("modules.logs.main._logs_client", return_value=client):
+            query_chunk_recursively("group", start, end, "fields @message")
+
+        ranges = [(c.kwargs["startTime"], c.kwargs["endTime"]) for c in client.start_query.call_args_list]
+        base = to_unix_seconds(start)
+        assert ranges == [(base, base + 9), (base, base + 4), (base + 5, base + 9)]
+
+    def test_unsplittable_range_stops_subdividing(self) -> None:
+        """Test that a saturated single second is returned truncated instead of looping."""
+        start = datetime(2025, 1, 15, 0, 0, 0, tzinfo=timezone.utc)
+        end = datetime(2025, 1, 15, 0, 0, 1, tzinfo=timezone.utc)
+
+        client = fake_logs_client(lambda group, start, end, query, limit: ("Complete", self.fake_rows(start, limit)))
+        with patch("modules.logs.main.MAX_RESULTS_PER_QUERY", 5), \
+                patch("modules.logs.main._logs_client", return_value=client):
+            rows = query_chunk_recursively("group", start, end, "fields @message")
+
+        assert client.start_query.call_count == 3  # [0, 1] -> [0, 0] and [1, 1]
+        assert len(rows) == 10
+
+    def test_failed_subrange_is_skipped(self) -> None:
+        """Test that a failed sub-query does not discard its sibling's rows."""
+        start = datetime(2025, 1, 15, 0, 0, 0, tzinfo=timezone.utc)
+        end = datetime(2025, 1, 15, 2, 0, 0, tzinfo=timezone.utc)
+
+        def fake_query(group, start, end, query, limit):
+            if (end - start).total_seconds() > 3600:
+                return "Complete", self.fake_rows(start, limit)
+            if start.hour == 0:
+                return "Failed", []
+            return "Complete", self.fake_rows(start, 3)
+
+        client = fake_logs_client(fake_query)
+        with patch("modules.logs.main.MAX_RESULTS_PER_QUERY", 5), \
+                patch("modules.logs.main._logs_client", return_value=client):
+            rows = query_chunk_recursively("group", start, end, "fields @message")
+
+        assert len(rows) == 3
+
+    def test_saturated_aggregation_is_not_subdivided(self) -> None:
+        """Test that an aggregation hitting the limit is returned truncated instead of split."""
+        start = datetime(2025, 1, 15, 0, 0, 0, tzinfo=timezone.utc)
+        end = datetime(2025, 1, 15, 2, 0, 0, tzinfo=timezone.utc)
+        rows = [[{"field": "count(*)", "value": "1"}]] * 5
+
+        client = fake_logs_client(lambda *args: ("Complete", rows))
+        with patch("modules.logs.main.MAX_RESULTS_PER_QUERY", 5), \
+                patch("modules.logs.main._logs_client", return_value=client):
+            result = query_chunk_recursively("group", start, end, "stats count(*) by bin(1m)")
+
+        assert client.start_query.call_count == 1
+        assert len(result) == 5
+
+
+class TestQueryInsightsCached:
+    """Tests for the Insights results disk cache."""
+
+    START = datetime(2025, 1, 15, 0, 0, 0, tzinfo=timezone.utc)
+    END = datetime(2025, 1, 15, 1, 0, 0, tzinfo=timezone.utc)
+
+    @pytest.fixture
+    def cache(self, tmp_path: Path):
+        """Isolated cache directory per test."""
+        with Cache(str(tmp_path)) as cache, patch("modules.logs.main._insights_cache", return_value=cache):
+            yield cache
+
+    def test_repeated_query_hits_cache(self, cache: Cache) -> None:
+        """Test that an identical query is only sent to Insights once."""
+        rows = [[{"field": "@message", "value": "boom"}]]
+
+        client = fake_logs_client(lambda *args: ("Complete", rows))
+        with patch("modules.logs.main._logs_client", return_value=client):
+            first = query_insights_cached("group", self.START, self.END, "fields @message")
+            second = query_insights_cached("group", self.START, self.END, "fields @message")
+
+        assert client.start_query.call_count == 1
+        assert first == second == [{"@message": "boom"}]
+
+    def test_different_query_is_not_shared(self, cache: Cache) -> None:
+        """Test that the query string is part of the cache key."""
+        rows = [[{"field": "@message", "value": "boom"}]]
+
+        client = fake_logs_client(lambda *args: ("Complete", rows))
+        with patch("modules.logs.main._logs_client", return_value=client):
+            query_insights_cached("group", self.START, self.END, "fields @message")
+            query_insights_cached("group", self.START, self.END, "fields @message | limit 5")
+
+        assert client.start_query.call_count == 2
+
+    def test_failed_query_is_not_cached(self, cache: Cache) -> None:
+        """Test that failed queries are retried on the next call."""
+        client = fake_logs_client(lambda *args: ("Failed", []))
+        with patch("modules.logs.main._logs_client", return_value=client):
+            query_insights_cached("group", self.START, self.END, "fields @message")
+            query_insights_cached("group", self.START, self.END, "fields @message")
+
+        assert client.start_query.call_count == 2
+        assert len(cache) == 0
+
+    def test_window_ending_near_now_is_not_cached(self, cache: Cache) -> None:
+        """Test that late-arriving events are picked up when the window is still being ingested."""
+        rows = [[{"field": "@message", "value": "boom"}]]
+        end = datetime.now(timezone.utc)
+        start = end - timedelta(hours=1)
+
+        client = fake_logs_client(lambda *args: ("Complete", rows))
+        with patch("modules.logs.main._logs_client", return_value=client):
+            query_insights_cached("group", start, end, "fields @message")
+            query_insights_cached("group", start, end, "fields @message")
+
+        assert client.start_query.call_count == 2
+        assert len(cache) == 0
+
+
+class TestArchivePartitionPrefixes:
+    """Tests for archive_partition_prefixes function."""
+
+    def test_hourly_prefixes_cover_range(self) -> None:
+        """Test that every hour touched by the range gets a prefix."""
+        start = datetime(2025, 1, 15, 22, 30, 0, tzinfo=timezone.utc)
+        end = datetime(2025, 1, 16, 0, 10, 0, tzinfo=timezone.utc)
+
+        result = archive_partition_prefixes("logs/", start, end)
+
+        assert result == [
+            "logs/year=2025/month=01/day=15/hour=22/",
+            "logs/year=2025/month=01/day=15/hour=23/",
+            "logs/year=2025/month=01/day=16/hour=00/",
+        ]
+
+    def test_non_utc_range_uses_utc_partitions(self) -> None:
+        """Test that aware datetimes are converted to UTC partitions."""
+        madrid = timezone(timedelta(hours=1))
+        start = datetime(2025, 1, 15, 13, 0, 0, tzinfo=madrid)
+
+        result = archive_partition_prefixes("", start, start)
+
+        assert result == ["year=2025/month=01/day=15/hour=12/"]
+
+
+class TestFetchRecordsViaS3:
+    """Tests for reading log records from the S3 Parquet archive."""
+
+    @pytest.fixture
+    def archive(self, tmp_path: Path):
+        """Local directory standing in for the bucket, served through a pyarrow filesystem."""
+        fs = pytest.importorskip("pyarrow.fs")
+        filesystem = fs.SubTreeFileSystem(str(tmp_path), fs.LocalFileSystem())
+        with patch("modules.logs.main._archive_filesystem", return_value=filesystem), \
+                patch.dict("modules.logs.main.S3_LOG_ARCHIVES", {"group": "s3://bucket/logs"}):
+            yield tmp_path / "bucket" / "logs"
+
+    @staticmethod
+    def write_partition(directory: Path, timestamps: list, messages: list[str], ts_type=None) -> None:
+        """Write an archive object with an extra column that must not be read."""
+        pa = pytest.importorskip("pyarrow")
+        pq = pytest.importorskip("pyarrow.parquet")
+        table = pa.table({
+            "@timestamp": pa.array(timestamps, type=ts_type or pa.timestamp("ms")),
+            "@message": messages,
+            "@logStream": ["stream"] * len(messages),
+        })
+        directory.mkdir(parents=True, exist_ok=True)
+        pq.write_table(table, directory / "part-0.parquet", row_group_size=2)
+
+    def test_reads_partitions_in_range(self, archive: Path) -> None:
+        """Test that only overlapping partitions are read and rows are trimmed to the range."""
+        start = datetime(2025, 1, 15, 12, 15, 0, tzinfo=timezone.utc)
+        end = datetime(2025, 1, 15, 12, 45, 0, tzinfo=timezone.utc)
+        self.write_partition(
+            archive / "year=2025/month=01/day=15/hour=12",
+            [datetime(2025, 1, 15, 12, 30), datetime(2025, 1, 15, 12, 0), datetime(2025, 1, 15, 12, 20, 0, 5000)],
+            ["second", "outside", "first"],
+        )
+        self.write_partition(archive / "year=2025/month=01/day=15/hour=13", [datetime(2025, 1, 15, 12, 40)], ["late"])
+
+        rows = fetch_records_via_s3("group", start, end)
+
+        assert rows == [
+            {"@timestamp": "2025-01-15 12:20:00.005", "@message": "first"},
+            {"@timestamp": "2025-01-15 12:30:00.000", "@message": "second"},
+        ]
+
+    def test_stops_reading_past_max_records(self, archive: Path) -> None:
+        """Test that row groups beyond MAX_LOG_RECORDS are not read."""
+        start = datetime(2025, 1, 15, 12, 0, 0, tzinfo=timezone.utc)
+        end = datetime(2025, 1, 15, 12, 59, 0, tzinfo=timezone.utc)
+        self.write_partition(
+            archive / "year=2025/month=01/day=15/hour=12",
+            [datetime(2025, 1, 15, 12, minute) for minute in range(6)],
+            [f"m{minute}" for minute in range(6)],
+        )
+
+        with patch("modules.logs.main.MAX_LOG_RECORDS", 3):
+            rows = fetch_records_via_s3("group", start, end)
+
+        assert [entry["@message"] for entry in rows] == ["m0", "m1", "m2", "m3"]
+
+    def test_untyped_timestamps_warn(self, archive: Path, caplog: pytest.LogCaptureFixture) -> None:
+        """Test that string timestamps are returned untrimmed with a warning."""
+        pa = pytest.importorskip("pyarrow")
+        start = datetime(2025, 1, 15, 12, 15, 0, tzinfo=timezone.utc)
+        self.write_partition(
+            archive / "year=2025/month=01/day=15/hour=12", ["2025-01-15 12:00:00.000"], ["early"], pa.string()
+        )
+
+        rows = fetch_records_via_s3("group", start, start)
+
+        assert rows == [{"@timestamp": "2025-01-15 12:00:00.000", "@message": "early"}]
+        assert "not a timestamp type" in caplog.text
+
+    def test_no_objects_returns_empty(self, archive: Path) -> None:
+        """Test that a range without archived objects yields no rows."""
+        start = datetime(2025, 1, 15, 12, 0, 0, tzinfo=timezone.utc)
+
+        rows = fetch_records_via_s3("group", start, start)
+
+        assert rows == []
+
+
+class TestFetchRecords:
+    """Tests for routing between the S3 archive and Insights."""
+
+    def test_archived_group_skips_insights(self) -> None:
+        """Test that the default query on an S3-backed log group never starts an Insights query."""
+        start = datetime(2025, 1, 15, 12, 0, 0, tzinfo=timezone.utc)
+
+        with patch.dict("modules.logs.main.S3_LOG_ARCHIVES", {"group": "s3://bucket"}), \
+                patch("modules.logs.main.fetch_records_via_s3", return_value=[]) as via_s3, \
+                patch("modules.logs.main.query_insights_cached") as via_insights:
+            fetch_records("group", start, start, DEFAULT_CW_SQL)
+
+        via_s3.assert_called_once_with("group", start, start)
+        via_insights.assert_not_called()
+
+    def test_archived_group_custom_query_uses_insights(self) -> None:
+        """Test that a custom query on an S3-backed log group is run through Insights."""
+        start = datetime(2025, 1, 15, 12, 0, 0, tzinfo=timezone.utc)
+        query = "fields @message | filter @message like /ERROR/"
+
+        with patch.dict("modules.logs.main.S3_LOG_ARCHIVES", {"group": "s3://bucket"}), \
+                patch("modules.logs.main.fetch_records_via_s3") as via_s3, \
+                patch("modules.logs.main.query_insights_cached", return_value=[]) as via_insights:
+            fetch_records("group", start, start, query)
+
+        via_insights.assert_called_once_with("group", start, start, query=query)
+        via_s3.assert_not_called()
+
+    def test_other_groups_use_insights(self) -> None:
+        """Test that groups without an archive are queried through Insights."""
+        start = datetime(2025, 1, 15, 12, 0, 0, tzinfo=timezone.utc)
+
+        with patch("modules.logs.main.query_insights_cached", return_value=[]) as via_insights:
+            fetch_records("other", start, start, "fields @message")
+
+        via_insights.assert_called_once_with("other", start, start, query="fields @message")
+
+
+class TestAskToLogRouting:
+    """Tests for routing fetched logs to single or parallel analysis."""
+
+    START = datetime(2025, 1, 15, 0, 0, 0, tzinfo=timezone.utc)
+    END = datetime(2025, 1, 15, 1, 0, 0, tzinfo=timezone.utc)
+
+    def test_large_dataset_is_not_fetched_twice(self) -> None:
+        """Test that routing to parallel processing reuses the fetched logs."""
+        logs = [{"@message": f"m{i}"} for i in range(CHUNK_SIZE + 1)]
+
+        with patch("modules.logs.main.fetch_records", return_value=logs) as fetch, \
+                patch("modules.logs.main._analyze_in_parallel", return_value=("ok", {})) as parallel:
+            ask_to_log("group", "what failed?", self.START, self.END)
+
+        fetch.assert_called_once()
+        assert parallel.call_args.args[0] is logs
+
+    def test_single_chunk_is_not_fetched_twice(self) -> None:
+        """Test that a one-chunk parallel run falls back to a single agent on the same logs."""
+        logs = [{"@message": f"m{i}"} for i in range(3)]
+
+        with patch("modules.logs.main.fetch_records", return_value=logs) as fetch, \
+                patch("modules.logs.main._analyze_with_single_agent", return_value=("ok", {})) as single:
+            ask_to_log_parallel("group", "what failed?", self.START, self.END)
+
+        fetch.assert_called_once()
+        assert single.call_args.args[0] is logs
+
+
+class TestParallelWorkers:
+    """Tests for fanning chunks out to worker agents."""
+
+    def test_results_keep_chunk_order_and_failures(self) -> None:
+        """Test that a crashing worker becomes a failed result in its chunk's position."""
+        start = datetime(2025, 1, 15, 0, 0, 0, tzinfo=timezone.utc)
+        logs = [{"@message": f"m{i}", "@timestamp": f"t{i}"} for i in range(3)]
+
+        def fake_worker(chunk, question, log_group, global_metadata):
+            if chunk.chunk_index == 1:
+                raise RuntimeError("throttled")
+            return ChunkAnalysisResult(
+                chunk_index=chunk.chunk_index,
+                chunk_time_range=chunk.get_time_range_description(),
+                chunk_size=chunk.chunk_size,
+                analysis=f"analysis {chunk.chunk_index}",
+                success=True,
+                processing_time_seconds=0.1,
+            )
+
+        with patch("modules.logs.main.fetch_records", return_value=logs), \
+                patch("modules.logs.main.analyze_chunk_with_worker", side_effect=fake_worker), \
+                patch("modules.logs.main.consolidate_with_coordinator", return_value="final") as coordinator:
+            analysis, metadata = ask_to_log_parallel("group", "what failed?", start, start, chunk_size=1)
+
+        chunk_results = coordinator.call_args.args[0]
+        assert analysis == "final"
+        assert [r.chunk_index for r in chunk_results] == [0, 1, 2]
+        assert [r.success for r in chunk_results] == [True, False, True]
+        assert "throttled" in chunk_results[1].error_message
+        assert metadata["chunks_failed"] == 1
+
+
+class TestConsolidateWithCoordinator:
+    """Tests for consolidate_with_coordinator function."""
+
+    START = datetime(2025, 1, 15, 0, 0, 0, tzinfo=timezone.utc)
+    END = datetime(2025, 1, 15, 1, 0, 0, tzinfo=timezone.utc)
+
+    @staticmethod
+    def result(index: int, success: bool = True) -> ChunkAnalysisResult:
+        """Chunk result with a recognisable analysis or error."""
+        return ChunkAnalysisResult(
+            chunk_index=index,
+            chunk_time_range="t0 to t1",
+            chunk_size=10,
+            analysis=f"analysis {index}" if success else "",
+            success=success,
+            error_message=None if success else "throttled",
+            processing_time_seconds=0.1,
+        )
+
+    def test_single_success_skips_coordinator(self) -> None:
+        """Test that one successful chunk is returned without another model call."""
+        results = [self.result(0), self.result(1, success=False)]
+
+        with patch("modules.logs.main.create_agent") as create_agent:
+            analysis = consolidate_with_coordinator(results, "q", "group", self.START, self.END, 20)
+
+        create_agent.assert_not_called()
+        assert analysis.startswith("## Worker analysis of chunk 1 of 2 (not consolidated)")
+        assert "analysis 0" in analysis
+        assert "Chunk 2: throttled" in analysis
+
+    def test_multiple_successes_use_coordinator(self) -> None:
+        """Test that several analyses are synthesized by the coordinator agent."""
+        results = [self.result(0), self.result(1)]
+
+        with patch("modules.logs.main.create_agent") as create_agent:
+            create_agent.return_value.return_value = "final"
+            analysis = consolidate_with_coordinator(results, "q", "group", self.START, self.END, 20)
+
+        create_agent.assert_called_once()
+        assert analysis == "final"
+
+    def test_context_is_markdown(self) -> None:
+        """Test that analyses reach the coordinator unescaped under per-chunk headings."""
+        results = [self.result(0), self.result(1), self.result(2, success=False)]
+        results[0].analysis = 'Saw "timeout"\ntwice'
+
+        with patch("modules.logs.main.create_agent") as create_agent:
+            consolidate_with_coordinator(results, "q", "group", self.START, self.END, 30)
+
+        prompt = create_agent.return_value.call_args.kwargs["prompt"]
+        context = prompt[1]["text"]
+        assert '# Chunk 1 (t0 to t1, 10 records, 0.10s)\nSaw "timeout"\ntwice' in context
+        assert "# Chunk 2" in context
+        assert "# Failed Chunks\n- Chunk 3: throttled" in context
+
+
 class TestCalculatePayloadSize:
     """Tests for calculate_payload_size function."""
 
-    def test_empty_dict(self) -> None:
-        """Test size calculation for empty dict."""
-        bytes_size, kb_size, mb_size = calculate_payload_size({})
+    def test_empty_payload(self) -> None:
+        """Test size calculation for an empty JSON object."""
+        bytes_size, kb_size, mb_size = calculate_payload_size(orjson.dumps({}))
 
         assert bytes_size == 2  # "{}"
         assert kb_size == 2 / 1024
         assert mb_size == 2 / 1024 / 1024
 
-    def test_simple_dict(self) -> None:
-        """Test size calculation for simple dict."""
-        data = {"key": "value"}
+    def test_simple_payload(self) -> None:
+        """Test size calculation for a simple serialized dict."""
+        blob = orjson.dumps({"key": "value"})
 
-        bytes_size, kb_size, mb_size = calculate_payload_size(data)
+        bytes_size, kb_size, mb_size = calculate_payload_size(blob)
 
-        expected_bytes = len('{"key": "value"}'.encode("utf-8"))
+        expected_bytes = len(b'{"key":"value"}')
         assert bytes_size == expected_bytes
         assert kb_size == expected_bytes / 1024
         assert mb_size == expected_bytes / 1024 / 1024
 
+    def test_counts_utf8_bytes(self) -> None:
+        """Test that multi-byte characters are counted as encoded bytes."""
+        blob = orjson.dumps({"msg": "año"})
+
+        bytes_size, _, _ = calculate_payload_size(blob)
+
+        assert bytes_size == len('{"msg":"año"}'.encode("utf-8"))
+
     def test_nested_structure(self) -> None:
         """Test size calculation for nested structure."""
-        data = {"logs": [{"msg": "test"}, {"msg": "test2"}], "count": 2}
+        blob = orjson.dumps({"logs": [{"msg": "test"}, {"msg": "test2"}], "count": 2})
 
-        bytes_size, kb_size, mb_size = calculate_payload_size(data)
+        bytes_size, kb_size, mb_size = calculate_payload_size(blob)
 
-        assert bytes_size > 0
+        assert bytes_size == len(blob)
         assert kb_size == bytes_size / 1024
         assert mb_size == kb_size / 1024
 
     def test_returns_tuple_of_three(self) -> None:
         """Test that function returns tuple of three values."""
-        result = calculate_payload_size({"test": 1})
+        result = calculate_payload_size(orjson.dumps({"test": 1}))
 
         assert isinstance(result, tuple)
         assert len(result) == 3
 
 
+class TestCollapseDuplicateLogs:
+    """Tests for collapse_duplicate_logs function."""
+
+    def test_counts_repeated_messages(self) -> None:
+        """Test that repeated messages collapse into one sample with a count."""
+        logs = [
+            {"@timestamp": "t1", "@message": "boom"},
+            {"@timestamp": "t2", "@message": "ok"},
+            {"@timestamp": "t3", "@message": "boom"},
+        ]
+
+        result = collapse_duplicate_logs(logs)
+
+        assert result == [
+            {"sample": {"@timestamp": "t1", "@message": "boom"}, "count": 2},
+            {"sample": {"@timestamp": "t2", "@message": "ok"}, "count": 1},
+        ]
+
+    def test_compares_message_prefix_only(self) -> None:
+        """Test that messages differing after the prefix are treated as duplicates."""
+        logs = [{"@message": "error id=1"}, {"@message": "error id=2"}]
+
+        result = collapse_duplicate_logs(logs, prefix_chars=5)
+
+        assert len(result) == 1
+        assert result[0]["count"] == 2
+
+    def test_missing_message_field(self) -> None:
+        """Test that entries without @message are each kept, in order."""
+        logs = [
+            {"level": "INFO"},
+            {"@message": "boom"},
+            {"level": "WARN"},
+            {"@message": "boom"},
+        ]
+
+        result = collapse_duplicate_logs(logs)
+
+        assert result == [
+            {"sample": {"level": "INFO"}, "count": 1},
+            {"sample": {"@message": "boom"}, "count": 2},
+            {"sample": {"level": "WARN"}, "count": 1},
+        ]
+
+    def test_empty_logs(self) -> None:
+        """Test that no logs collapse to an empty list."""
+        assert collapse_duplicate_logs([]) == []
+
+
+class TestIsAggregationQuery:
+    """Tests for is_aggregation_query function."""
+
+    @pytest.mark.parametrize("query", [
+        "stats count(*) by bin(5m)",
+        "fields @message | stats count(*) by @logStream",
+        "filter level = 'ERROR' |STATS avg(duration)",
+    ])
+    def test_detects_stats_command(self, query: str) -> None:
+        """Test that queries with a stats command are aggregations."""
+        assert is_aggregation_query(query) is True
+
+    @pytest.mark.parametrize("query", [
+        "fields @timestamp, @message | sort @timestamp asc",
+        "filter @message like /stats /",
+        "fields statsd_metric",
+    ])
+    def test_ignores_non_aggregations(self, query: str) -> None:
+        """Test that stats appearing outside a command does not count."""
+        assert is_aggregation_query(query) is False
+
+
+class TestWorkerLogContext:
+    """Tests for the log context sent to worker agents."""
+
+    @staticmethod
+    def worker_contexts(cloudwatch_sql: str, logs: list[dict]) -> list[dict]:
+        """Run the parallel path with a fake agent and return the log context each worker sent."""
+        start = datetime(2025, 1, 15, 0, 0, 0, tzinfo=timezone.utc)
+        agent = MagicMock(return_value="analysis")
+
+        with patch("modules.logs.main.fetch_records", return_value=logs), \
+                patch("modules.logs.main.create_agent", return_value=agent), \
+                patch("modules.logs.main.consolidate_with_coordinator", return_value="final"):
+            ask_to_log_parallel("group", "q", start, start, cloudwatch_sql=cloudwatch_sql, chunk_size=2)
+
+        contexts = []
+        for call in agent.call_args_list:
+            context_text = call.kwargs["prompt"][1]["text"].removeprefix("Log context: ")
+            contexts.append(orjson.loads(context_text))
+        return sorted(contexts, key=lambda c: c["metadata"]["chunk_index"])
+
+    def test_duplicate_messages_are_collapsed(self) -> None:
+        """Test that workers receive repeated messages once with a count."""
+        logs = [{"@message": "boom", "@timestamp": f"t{i}"} for i in range(4)]
+
+        contexts = self.worker_contexts("fields @timestamp, @message", logs)
+
+        assert [c["logs"] for c in contexts] == [
+            [{"sample": logs[0], "count": 2}],
+            [{"sample": logs[2], "count": 2}],
+        ]
+
+    def test_stats_rows_are_not_collapsed(self) -> None:
+        """Test that rows of an aggregation query reach the workers untouched."""
+        logs = [{"bin(5m)": f"t{i}", "count(*)": str(i)} for i in range(4)]
+
+        contexts = self.worker_contexts("stats count(*) by bin(5m)", logs)
+
+        assert [c["logs"] for c in contexts] == [logs[0:2], logs[2:4]]
+
+
 class TestParseLogEntry:
     """Tests for parse_log_entry function."""
 
@@ -232,3 +929,11 @@ class TestCreateLogChunks:
 
         assert result[0].logs == records[:3]
         assert result[1].logs == records[3:]
+
+    def test_logs_are_not_copied(self) -> None:
+        """Test that chunks reference the parsed log dicts instead of copying them."""
+        records = [{"@message": f"msg{i}"} for i in range(5)]
+
+        result = create_log_chunks(records, chunk_size=3)
+
+        assert all(a is b for a, b in zip(result[0].logs + result[1].logs, records))
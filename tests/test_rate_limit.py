@@ -0,0 +1,74 @@
+"""Tests for the model call rate limiter."""
+
+from unittest.mock import patch
+
+import pytest
+
+from modules.ai.rate_limit import TokenBucket
+
+
+class FakeClock:
+    """Monotonic clock that only advances when sleep() is called."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    """Patch the rate limiter's time source with a fake clock."""
+    fake = FakeClock()
+    with patch("modules.ai.rate_limit.time.monotonic", fake.monotonic), \
+            patch("modules.ai.rate_limit.time.sleep", fake.sleep):
+        yield fake
+
+
+class TestTokenBucket:
+    """Tests for TokenBucket."""
+
+    def test_acquire_within_capacity_does_not_wait(self, clock: FakeClock) -> None:
+        """Test that a full bucket serves requests immediately."""
+        bucket = TokenBucket(capacity=100, refill_per_second=10)
+
+        waited = bucket.acquire(60)
+
+        assert waited == 0.0
+        assert clock.sleeps == []
+
+    def test_acquire_waits_for_refill(self, clock: FakeClock) -> None:
+        """Test that a drained bucket blocks until enough tokens are refilled."""
+        bucket = TokenBucket(capacity=100, refill_per_second=10)
+        bucket.acquire(100)
+
+        waited = bucket.acquire(30)
+
+        assert waited == pytest.approx(3.0)
+        assert clock.now == pytest.approx(3.0)
+
+    def test_refill_is_capped_at_capacity(self, clock: FakeClock) -> None:
+        """Test that idle time never accumulates more than the capacity."""
+        bucket = TokenBucket(capacity=100, refill_per_second=10)
+        bucket.acquire(100)
+        clock.now += 1000
+
+        bucket.acquire(100)
+        waited = bucket.acquire(10)
+
+        assert waited == pytest.approx(1.0)
+
+    def test_oversized_request_is_clamped(self, clock: FakeClock) -> None:
+        """Test that a request above capacity waits for a full bucket rather than forever."""
+        bucket = TokenBucket(capacity=100, refill_per_second=10)
+        bucket.acquire(50)
+
+        waited = bucket.acquire(500)
+
+        assert waited == pytest.approx(5.0)
@@ -65,6 +65,7 @@ class TestParseTimeRange:
             fixed_now = datetime(2025, 1, 15, 12, 30, 45, tzinfo=timezone.utc)
             mock_dt.now.return_value = fixed_now
             mock_dt.strptime = datetime.strptime
+            mock_dt.side_effect = lambda *args, **kwargs: datetime(*args, **kwargs)
 
             start, end = parse_time_range("since yesterday")
 
@@ -78,6 +79,7 @@ class TestParseTimeRange:
             fixed_now = datetime(2025, 1, 15, 12, 30, 45, tzinfo=timezone.utc)
             mock_dt.now.return_value = fixed_now
             mock_dt.strptime = datetime.strptime
+            mock_dt.side_effect = lambda *args, **kwargs: datetime(*args, **kwargs)
 
             start, end = parse_time_range("since today")
 
@@ -99,6 +101,23 @@ class TestParseTimeRange:
         assert start == datetime(2025, 1, 1, 10, 0, 0, tzinfo=timezone.utc)
         assert end == datetime(2025, 1, 1, 18, 0, 0, tzinfo=timezone.utc)
 
+    def test_absolute_range_is_cached(self) -> None:
+        """Test that repeated absolute ranges return the cached result."""
+        first = parse_time_range("2025-03-01 to 2025-03-02")
+        second = parse_time_range("  2025-03-01 TO 2025-03-02 ")
+
+        assert first is second
+
+    def test_relative_range_is_not_cached(self) -> None:
+        """Test that relative ranges are recomputed from the current time."""
+        with patch("modules.logs.time_parser.datetime") as mock_dt:
+            mock_dt.now.return_value = datetime(2025, 1, 15, 12, 0, 0, tzinfo=timezone.utc)
+            _, first_end = parse_time_range("last 1 hour")
+            mock_dt.now.return_value = datetime(2025, 1, 15, 13, 0, 0, tzinfo=timezone.utc)
+            _, second_end = parse_time_range("last 1 hour")
+
+        assert second_end - first_end == timedelta(hours=1)
+
     def test_invalid_format_raises_value_error(self) -> None:
         """Test that invalid format raises ValueError."""
         with pytest.raises(ValueError) as exc_info:
@@ -152,3 +171,23 @@ class TestParseSingleDatetime:
         result = _parse_single_datetime("2025-01-15")
 
         assert result.tzinfo == timezone.utc
+
+    def test_explicit_offset_is_converted_to_utc(self) -> None:
+        """Test that an ISO offset is honoured and normalized to UTC."""
+        result = _parse_single_datetime("2025-01-15t10:30:00+02:00")
+
+        assert result == datetime(2025, 1, 15, 8, 30, 0, tzinfo=timezone.utc)
+        assert result.tzinfo == timezone.utc
+
+    def test_non_padded_date_falls_back(self) -> None:
+        """Test that dates without zero padding are still accepted."""
+        result = _parse_single_datetime("2025-1-5")
+
+        assert result == datetime(2025, 1, 5, 0, 0, 0, tzinfo=timezone.utc)
+
+    def test_out_of_range_date_raises_value_error(self) -> None:
+        """Test that a well-formed but impossible date raises ValueError."""
+        with pytest.raises(ValueError) as exc_info:
+            _parse_single_datetime("2025-02-30")
+
+        assert "Cannot parse datetime" in str(exc_info.value)